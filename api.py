@@ -0,0 +1,241 @@
+"""JSON API только для чтения рядом с сайтом Streamlit (стандартная библиотека).
+
+Данные считаются функциями views.py — теми же, что у страниц и статической версии.
+
+    GET /api/partitions                        сезоны и чемпионаты
+    GET /api/standings?round=5                 таблица (после тура)
+    GET /api/rounds                            список туров
+    GET /api/rounds/<тур>                      результаты тура с событиями матчей
+    GET /api/matches/<тур>?home=...&away=...   события одного матча
+    GET /api/cup                               сетка кубка
+    GET /api/teams                             команды
+    GET /api/teams/<команда>                   состав с показателями и матчи команды
+    GET /api/leaderboards?competition=league&kind=goals
+
+Во всех запросах можно указать season и league. Списки отдаются постранично
+(page, per_page). ETag строится из хэшей исходных файлов, поэтому повторный запрос
+с If-None-Match получает 304 без пересчёта; ответы сжимаются gzip по Accept-Encoding.
+
+Запуск: python api.py [--host 127.0.0.1] [--port 8502]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from data_loader import file_exists, file_hash
+from event_store import CUP, LEAGUE
+from exports import LEADERBOARD_KINDS
+from seasons import MANIFEST_FILE, get_partition, partitions
+from views import (cup_view, dependency_paths, leaderboards_view, league_rounds, league_teams, round_view,
+                   standings_view, team_view)
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+MIN_GZIP_SIZE = 512
+MAX_CACHED_RESPONSES = 256
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(params, name, default=None):
+    value = params.get(name, default)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"параметр {name} должен быть числом")
+
+
+def _paginate(items, params):
+    page = max(_int_param(params, "page", 1), 1)
+    per_page = min(max(_int_param(params, "per_page", DEFAULT_PER_PAGE), 1), MAX_PER_PAGE)
+    start = (page - 1) * per_page
+    return {"items": items[start:start + per_page], "page": page, "per_page": per_page, "total": len(items)}
+
+
+def _partitions(partition, params, groups):
+    return [{"season": p.season, "league": p.league, "year": p.year, "league_title": p.league_title,
+             "cup_title": p.cup_title} for p in partitions()]
+
+
+def _standings(partition, params, groups):
+    return standings_view(partition, _int_param(params, "round"))
+
+
+def _rounds(partition, params, groups):
+    return _paginate(league_rounds(partition), params)
+
+
+def _round(partition, params, groups):
+    round_ = int(groups[0])
+    if round_ not in league_rounds(partition):
+        raise ApiError(HTTPStatus.NOT_FOUND, f"нет тура {round_}")
+    return round_view(partition, round_)
+
+
+def _match(partition, params, groups):
+    round_ = int(groups[0])
+    for match in round_view(partition, round_)["matches"]:
+        if match["home"] == params.get("home") and match["away"] == params.get("away"):
+            return match
+    raise ApiError(HTTPStatus.NOT_FOUND, "матч не найден")
+
+
+def _cup(partition, params, groups):
+    return cup_view(partition)
+
+
+def _teams(partition, params, groups):
+    return _paginate(league_teams(partition), params)
+
+
+def _team(partition, params, groups):
+    team = unquote(groups[0])
+    if team not in league_teams(partition):
+        raise ApiError(HTTPStatus.NOT_FOUND, f"нет команды {team}")
+    data = team_view(partition, team)
+    data["squad"] = _paginate(data["squad"], params)
+    return data
+
+
+def _leaderboards(partition, params, groups):
+    competition = params.get("competition", LEAGUE)
+    kind = params.get("kind", "goals")
+    if competition not in (LEAGUE, CUP) or kind not in LEADERBOARD_KINDS:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"competition: {LEAGUE}|{CUP}; kind: {'|'.join(LEADERBOARD_KINDS)}")
+    return _paginate(leaderboards_view(partition)[competition][kind], params)
+
+
+# (шаблон пути, представление для зависимостей, обработчик); None — зависимость только от манифеста
+ROUTES = [
+    (re.compile(r"^/api/partitions$"), None, _partitions),
+    (re.compile(r"^/api/standings$"), "standings", _standings),
+    (re.compile(r"^/api/rounds$"), "standings", _rounds),
+    (re.compile(r"^/api/rounds/(\d+)$"), "rounds", _round),
+    (re.compile(r"^/api/matches/(\d+)$"), "rounds", _match),
+    (re.compile(r"^/api/cup$"), "cup", _cup),
+    (re.compile(r"^/api/teams$"), "teams", _teams),
+    (re.compile(r"^/api/teams/([^/]+)$"), "teams", _team),
+    (re.compile(r"^/api/leaderboards$"), "leaderboards", _leaderboards),
+]
+
+
+def resolve(path):
+    for pattern, view, handler in ROUTES:
+        match = pattern.match(path)
+        if match:
+            return view, handler, match.groups()
+    raise ApiError(HTTPStatus.NOT_FOUND, "нет такого адреса")
+
+
+def etag(path, params, partition, view):
+    # Сильный ETag: адрес с параметрами и хэши содержимого файлов, от которых зависит ответ
+    if view:
+        hashes = [file_hash(p) for p in dependency_paths(partition, view)]
+    else:
+        hashes = [file_hash(MANIFEST_FILE) if file_exists(MANIFEST_FILE) else None]
+    key = json.dumps([path, sorted(params.items()), partition.key, hashes], ensure_ascii=False)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def matching_etag(header, tag):
+    # Тег из If-None-Match, совпавший с текущим (с суффиксом -gzip или без); сравнение слабое, как в RFC 9110
+    for candidate in (header or "").split(","):
+        candidate = candidate.strip().removeprefix("W/").strip('"')
+        if candidate == "*":
+            return tag
+        if candidate in (tag, f"{tag}-gzip"):
+            return candidate
+    return None
+
+
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+def _cached_body(tag, build):
+    # Готовый JSON и его gzip по ETag: повторные ответы 200 тоже не пересчитываются
+    with _responses_lock:
+        if tag in _responses:
+            _responses.move_to_end(tag)
+            return _responses[tag]
+    body = json.dumps(build(), ensure_ascii=False).encode("utf-8")
+    entry = (body, gzip.compress(body, 6) if len(body) >= MIN_GZIP_SIZE else None)
+    with _responses_lock:
+        _responses[tag] = entry
+        while len(_responses) > MAX_CACHED_RESPONSES:
+            _responses.popitem(last=False)
+    return entry
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "FootballAPI/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            view, handler, groups = resolve(url.path.rstrip("/") or "/")
+            partition = get_partition(params.get("season"), params.get("league"))
+            tag = etag(url.path, params, partition, view)
+            matched = matching_etag(self.headers.get("If-None-Match"), tag)
+            if matched:
+                self._send(HTTPStatus.NOT_MODIFIED, tag=matched)
+                return
+            body, compressed = _cached_body(tag, lambda: handler(partition, params, groups))
+        except ApiError as e:
+            self._send_error(e.status, str(e))
+            return
+        except FileNotFoundError as e:
+            self._send_error(HTTPStatus.NOT_FOUND, f"нет файла данных {e.filename}")
+            return
+
+        if compressed is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            self._send(HTTPStatus.OK, compressed, tag=f"{tag}-gzip", encoding="gzip")
+        else:
+            self._send(HTTPStatus.OK, body, tag=tag)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8"))
+
+    def _send(self, status, body=b"", tag=None, encoding=None):
+        self.send_response(status)
+        if tag:
+            self.send_header("ETag", f'"{tag}"')
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if self.command != "HEAD" and status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON API сайта (только чтение)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"API: http://{args.host}:{args.port}/api/standings")
+    server.serve_forever()
@@ -0,0 +1,490 @@
+"""Замеры производительности расчётов сайта на синтетических сезонах.
+
+Запуск: python benchmarks.py — сравнение прежних и новых расчётов;
+python benchmarks.py suite [results.json] — набор замеров страниц на сгенерированных
+сезонах (synthetic.py) с записью результатов в JSON;
+python benchmarks.py compare old.json new.json — сравнение двух прогонов набора;
+python benchmarks.py memory — память модели составов season_model против словарей JSON.
+"""
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from cup_bracket import bracket_html
+from data_loader import (CUP_MATCH_STATS_FILE, CUP_MATCHES_FILE, MATCHES_FILE, SQUADS_FILE,
+                         clear_cache, load_cup_match_stats, load_match_stats, load_matches, read_json)
+from event_log import append_matches, event_log_path, write_event_log
+from event_store import LEAGUE, JsonEventStore, SqliteEventStore, import_files
+from exports import LEADERBOARD_KINDS, leaderboard
+from player_log import PlayerLog
+from player_search import PlayerIndex
+from player_stats import KINDS, build_event_frame, build_player_totals
+from registry import Registry
+from season_model import build_squads, deep_size
+from seasons import get_partition
+from simulation import season_odds
+from standings import StandingsStore, compute_standings
+from synthetic import SeasonGenerator, generate_season
+
+
+def synthetic_matches(n_teams, n_matches, seed=0):
+    rng = np.random.default_rng(seed)
+    teams = np.array([f"ФК Команда {i}" for i in range(n_teams)])
+    home = rng.integers(0, n_teams, n_matches)
+    away = (home + rng.integers(1, n_teams, n_matches)) % n_teams
+    hg = rng.poisson(1.6, n_matches).astype(float)
+    ag = rng.poisson(1.2, n_matches).astype(float)
+    # Часть матчей ещё не сыграна
+    unplayed = rng.random(n_matches) < 0.05
+    hg[unplayed] = np.nan
+    ag[unplayed] = np.nan
+    return pd.DataFrame({
+        "Тур": np.arange(n_matches) // max(n_teams // 2, 1) + 1,
+        "Хозяева": teams[home],
+        "Гости": teams[away],
+        "Голы хозяев": hg,
+        "Голы гостей": ag,
+    })
+
+
+def legacy_standings(matches):
+    # Прежний расчёт таблицы циклом по iterrows — эталон для сравнения
+    teams = pd.unique(matches[["Хозяева", "Гости"]].values.ravel())
+    stats = {team: {"Игры": 0, "Победы": 0, "Ничьи": 0, "Поражения": 0,
+                    "Забито": 0, "Пропущено": 0, "Очки": 0} for team in teams}
+
+    for _, row in matches.iterrows():
+        home, away = row["Хозяева"], row["Гости"]
+        hg, ag = row["Голы хозяев"], row["Голы гостей"]
+        if pd.isna(hg) or pd.isna(ag):
+            continue
+        hg, ag = int(hg), int(ag)
+
+        stats[home]["Игры"] += 1
+        stats[away]["Игры"] += 1
+        stats[home]["Забито"] += hg
+        stats[home]["Пропущено"] += ag
+        stats[away]["Забито"] += ag
+        stats[away]["Пропущено"] += hg
+
+        if hg > ag:
+            stats[home]["Победы"] += 1
+            stats[away]["Поражения"] += 1
+            stats[home]["Очки"] += 3
+        elif hg < ag:
+            stats[away]["Победы"] += 1
+            stats[home]["Поражения"] += 1
+            stats[away]["Очки"] += 3
+        else:
+            stats[home]["Ничьи"] += 1
+            stats[away]["Ничьи"] += 1
+            stats[home]["Очки"] += 1
+            stats[away]["Очки"] += 1
+
+    df = pd.DataFrame([{"Команда": team, **s, "Разница мячей": s["Забито"] - s["Пропущено"]}
+                       for team, s in stats.items()])
+    return df.sort_values(by=["Очки", "Разница мячей"], ascending=[False, False],
+                          kind="mergesort").reset_index(drop=True)
+
+
+def timeit(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_standings():
+    print("Турнирная таблица: iterrows против векторного расчёта")
+    for n_teams, n_matches in [(10, 72), (20, 1_000), (40, 10_000), (40, 100_000)]:
+        matches = synthetic_matches(n_teams, n_matches)
+        # Показатели команд совпадают; порядок равных по очкам теперь задают критерии ranking.py
+        expected = legacy_standings(matches).set_index("Команда").sort_index()
+        actual = compute_standings(matches).set_index("Команда").sort_index()
+        pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False)
+
+        legacy = timeit(legacy_standings, matches, repeat=1 if n_matches > 10_000 else 3)
+        vectorized = timeit(compute_standings, matches)
+        print(f"  {n_teams:>3} команд, {n_matches:>7} матчей: "
+              f"{legacy * 1000:9.2f} мс -> {vectorized * 1000:7.2f} мс (x{legacy / vectorized:.0f})")
+
+
+def bench_standings_store():
+    print("Снимки таблицы по турам: дозапись тура против полного пересчёта")
+    for n_teams, n_matches in [(10, 72), (40, 10_000), (40, 100_000)]:
+        matches = synthetic_matches(n_teams, n_matches)
+        last_round = matches["Тур"].max()
+        before = matches[matches["Тур"] < last_round]
+
+        store = StandingsStore()
+        store.update(before)
+        start = time.perf_counter()
+        store.update(matches)
+        incremental = time.perf_counter() - start
+        full = timeit(compute_standings, matches)
+
+        # Сверка снимков с полным пересчётом (на больших сезонах — выборочно)
+        mismatched = store.verify(matches) if n_matches <= 10_000 else []
+        assert not mismatched, f"расхождение в турах {mismatched}"
+        as_of = timeit(store.table_as_of, last_round // 2)
+        print(f"  {n_teams:>3} команд, {n_matches:>7} матчей: дозапись {incremental * 1000:6.2f} мс, "
+              f"полный пересчёт {full * 1000:6.2f} мс, таблица на тур {as_of * 1000:5.2f} мс")
+
+
+def bench_progression():
+    print("Ход сезона: места по турам одним расчётом против таблицы на каждый тур")
+    for n_teams, n_matches in [(10, 180), (40, 1_560)]:
+        matches = synthetic_matches(n_teams, n_matches)
+        store = StandingsStore()
+        store.update(matches)
+        progression = store.progression()
+        rounds = progression["Тур"].unique()
+        for round_ in rounds[::10]:
+            expected = store.table_as_of(round_)["Команда"].tolist()
+            assert progression[progression["Тур"] == round_].sort_values("Место")["Команда"].tolist() == expected
+
+        def vectorized():
+            store._progression = {}
+            store.progression()
+
+        per_round = timeit(lambda: [store.table_as_of(round_) for round_ in rounds], repeat=3)
+        print(f"  {n_teams:>3} команд, {len(rounds):>3} туров: {per_round * 1000:8.2f} мс -> "
+              f"{timeit(vectorized) * 1000:7.2f} мс, форма {timeit(store.form) * 1000:5.2f} мс")
+
+
+def bench_simulation(simulations=200_000):
+    print("Шансы на итоговые места: моделирование оставшейся половины сезона")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_teams, n_rounds in [(8, 28), (20, 38)]:
+            target = os.path.join(tmp, f"{n_teams}x{n_rounds}")
+            generate_season(target, n_teams, n_rounds, played_rounds=n_rounds // 2)
+            os.chdir(target)
+            try:
+                clear_cache()
+                partition = get_partition()
+                start = time.perf_counter()
+                season_odds(partition, simulations)
+                elapsed = time.perf_counter() - start
+            finally:
+                os.chdir(cwd)
+            print(f"  {n_teams:>3} команд, {simulations} сезонов: {elapsed:6.2f} с "
+                  f"({elapsed / simulations * 1e6:.2f} мкс на сезон)")
+    clear_cache()
+
+
+def _scaled_match_stats(factor):
+    # Копии сезона с другими номерами туров: ключи (хозяева, гости, тур) не повторяются
+    records = load_match_stats()["matches"]
+    last_round = max(record["round"] for record in records)
+    return {"matches": [{**record, "round": record["round"] + copy * last_round}
+                        for copy in range(factor) for record in records]}
+
+
+def _legacy_match_lookup(path, home, away, round_):
+    # Прежний путь: разбор всего файла и линейный поиск матча
+    with open(path, 'r', encoding='utf-8') as f:
+        match_stats = json.load(f)
+    for match in match_stats["matches"]:
+        if match["home_team"] == home and match["away_team"] == away and match.get("round") == round_:
+            return match
+
+
+def bench_event_store():
+    print("События матчей: JSON против SQLite (объём данных относительно текущего)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in (1, 10, 100):
+            stats_path = os.path.join(tmp, f"match_stats_{factor}.json")
+            scaled = _scaled_match_stats(factor)
+            with open(stats_path, 'w', encoding='utf-8') as f:
+                json.dump(scaled, f, ensure_ascii=False, indent=4)
+            target = scaled["matches"][-1]
+            key = (target["home_team"], target["away_team"], target["round"])
+
+            db_path = os.path.join(tmp, f"events_{factor}.db")
+            conn = sqlite3.connect(db_path)
+            start = time.perf_counter()
+            import_files(conn, MATCHES_FILE, stats_path, CUP_MATCHES_FILE, CUP_MATCH_STATS_FILE)
+            import_time = time.perf_counter() - start
+
+            sqlite_store = SqliteEventStore(db_path)
+            json_store = JsonEventStore(stats_path)
+
+            legacy = timeit(_legacy_match_lookup, stats_path, *key, repeat=3)
+            json_lookup = timeit(lambda: json_store.match_events(LEAGUE, *key[:2], round_=key[2]))
+            sqlite_lookup = timeit(lambda: sqlite_store.match_events(LEAGUE, *key[:2], round_=key[2]))
+            json_totals = timeit(json_store.player_totals, LEAGUE, repeat=3)
+            # Первый запрос после изменения файла: JSON разбирается целиком заново
+            json_cold = timeit(lambda: (clear_cache(), json_store.player_totals(LEAGUE)), repeat=3)
+            sqlite_totals = timeit(sqlite_store.player_totals, LEAGUE, repeat=3)
+            conn.close()
+
+            print(f"  x{factor:<3} ({len(scaled['matches']):>5} матчей, {os.path.getsize(stats_path) // 1024:>6} КБ): "
+                  f"импорт {import_time * 1000:8.1f} мс")
+            print(f"        поиск матча: json.load+перебор {legacy * 1000:8.2f} мс, "
+                  f"индекс JSON {json_lookup * 1000:6.3f} мс, SQLite {sqlite_lookup * 1000:6.3f} мс")
+            print(f"        итоги игроков: JSON {json_totals * 1000:8.2f} мс (с разбором файла {json_cold * 1000:8.2f} мс), "
+                  f"SQLite {sqlite_totals * 1000:8.2f} мс")
+
+
+def bench_event_log():
+    print("Добавление матча: разбор match_stats.json целиком против дочитывания журнала .jsonl")
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in (1, 10, 100):
+            records = _scaled_match_stats(factor)["matches"]
+            stats_path = os.path.join(tmp, f"match_stats_{factor}.json")
+            with open(stats_path, 'w', encoding='utf-8') as f:
+                json.dump({"matches": records}, f, ensure_ascii=False, indent=4)
+            full = timeit(read_json, stats_path, repeat=3)
+
+            log_path = event_log_path(stats_path)
+            write_event_log(log_path, records[:-1])
+            clear_cache()
+            load_match_stats(log_path)
+            append_matches(log_path, records[-1:])
+            start = time.perf_counter()
+            assert len(load_match_stats(log_path)["matches"]) == len(records)
+            tail = time.perf_counter() - start
+            print(f"  {len(records):>5} матчей ({os.path.getsize(stats_path) // 1024:>6} КБ): "
+                  f"json.load {full * 1000:8.2f} мс, журнал после дописывания {tail * 1000:6.3f} мс")
+
+
+def _synthetic_players(n_players, seed=0):
+    rng = np.random.default_rng(seed)
+    surnames = ["Иванов", "Ильин", "Романов", "Семёнов", "Шашков", "Хабибуллин", "Яковлев", "Юдин", "Щукин",
+                "Царёв", "Парамонов", "Мшаров"]
+    names = ["Артем", "Юрий", "Илья", "Семен", "Никита", "Роман", "Станислав", "Фёдор"]
+    return [{"name": f"{rng.choice(surnames)}{i % 97 or ''} {rng.choice(names)}", "team": f"ФК Команда {i % 40}",
+             "number": int(i % 99), "position": None, **dict(zip(KINDS, map(int, rng.poisson(2, len(KINDS)))))}
+            for i in range(n_players)]
+
+
+def bench_player_search():
+    print("Поиск игрока: перебор по подстроке против индекса")
+    queries = ["ильин", "Romanov", "семенов ю", "Habibullin", "царев", "шашко"]
+    for n_players in [300, 3_000, 30_000]:
+        players = _synthetic_players(n_players)
+        build = timeit(PlayerIndex, players, repeat=1)
+        index = PlayerIndex(players)
+        scan = timeit(lambda: [[p for p in players if q.lower() in p["name"].lower()] for q in queries])
+        search = timeit(lambda: [index.search(q) for q in queries])
+        print(f"  {n_players:>6} игроков: построение индекса {build * 1000:7.2f} мс, на запрос: "
+              f"перебор {scan / len(queries) * 1000:6.3f} мс, индекс {search / len(queries) * 1000:6.3f} мс")
+
+
+def _scan_player_log(match_stats, cup_match_stats, team, name):
+    # Прежний путь: просмотр всех матчей обоих турниров
+    found = []
+    for records in (match_stats["matches"], cup_match_stats["matches"]):
+        for record in records:
+            for goal in record.get("goals", []):
+                if goal["team"] == team and name in (goal.get("player"), goal.get("assist")):
+                    found.append((record.get("date"), goal.get("minute")))
+            for kind in ("yellow_cards", "red_cards"):
+                found += [(record.get("date"), card.get("minute")) for card in record.get(kind, [])
+                          if card["team"] == team and card["player"] == name]
+    return found
+
+
+def bench_player_log():
+    print("Журнал матчей игрока: просмотр всех матчей против обратного индекса")
+    cup_match_stats = load_cup_match_stats()
+    for factor in [1, 10, 100]:
+        match_stats = _scaled_match_stats(factor)
+        registry = Registry()
+        events = build_event_frame(match_stats, cup_match_stats, registry)
+        build = timeit(PlayerLog, events, registry, repeat=1)
+        log = PlayerLog(events, registry)
+        players = [(registry.teams[team], name) for name, team in zip(registry.player_names, registry.player_teams)]
+        sample = players[::max(1, len(players) // 20)]
+        scan = timeit(lambda: [_scan_player_log(match_stats, cup_match_stats, *player) for player in sample])
+        lookup = timeit(lambda: [log.matches(*player) for player in sample])
+        print(f"  {len(match_stats['matches']):>6} матчей: построение {build * 1000:7.2f} мс, на игрока: "
+              f"перебор {scan / len(sample) * 1000:7.3f} мс, индекс {lookup / len(sample) * 1000:6.3f} мс")
+
+
+# Сезоны набора замеров: (команд, туров, плотность событий)
+SUITE_SEASONS = [(10, 18, 1.0), (20, 38, 1.0), (40, 78, 2.0)]
+SUITE_PAGES = ["Чемпионат", "Кубок", "Составы команд", "Статистика", "Анонс тура"]
+SITE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "football_site.py")
+REGRESSION_RATIO = 1.2
+
+# AppTest не переключает страницы st.navigation с функциями, поэтому обёртка подменяет
+# выбор страницы, а «сегодня» в анонсе фиксируется серединой синтетического сезона
+_PAGE_SCRIPT = """
+import streamlit as st
+_navigation = st.navigation
+def _select_page(pages, **kwargs):
+    _navigation(pages, **kwargs)
+    page = next(page for page in pages if page.title == PAGE)
+    page._can_be_called = True
+    return page
+st.navigation = _select_page
+try:
+    exec(compile(open(SITE, encoding="utf-8").read().replace("datetime.now()", "NOW"), SITE, "exec"))
+finally:
+    st.navigation = _navigation
+"""
+
+
+def _page_app(page, now):
+    header = (f"from datetime import datetime\nPAGE = {page!r}\nSITE = {SITE_SCRIPT!r}\n"
+              f"NOW = datetime({now.year}, {now.month}, {now.day})\n")
+    return AppTest.from_string(header + _PAGE_SCRIPT, default_timeout=300)
+
+
+def _run_page(app):
+    app.run()
+    assert not app.exception, app.exception
+
+
+def _suite_season(tmp, n_teams, n_rounds, density):
+    # Половина туров сыграна; сезон укладывается в один календарный год
+    interval = max(1, min(7, 240 // n_rounds))
+    played = n_rounds // 2
+    target = os.path.join(tmp, f"{n_teams}x{n_rounds}x{density:g}")
+    summary = generate_season(target, n_teams, n_rounds, density, played_rounds=played, interval_days=interval)
+    start = SeasonGenerator().start
+    now = datetime.combine(start + timedelta(days=played * interval - 1), datetime.min.time())
+    return target, summary, now
+
+
+def suite_timings(now):
+    # Замеры в текущем каталоге данных; *_cold — с пустым кэшем data_loader
+    timings = {}
+    matches = load_matches()
+    timings["standings"] = timeit(compute_standings, matches)
+
+    match_stats, cup_match_stats = load_match_stats(), load_cup_match_stats()
+    def leaderboards():
+        registry = Registry()
+        totals = build_player_totals(build_event_frame(match_stats, cup_match_stats, registry), registry)
+        return [leaderboard(totals, kind) for kind in LEADERBOARD_KINDS]
+
+    timings["leaderboards"] = timeit(leaderboards)
+    timings["cup_bracket_cold"] = timeit(lambda: (clear_cache(), bracket_html()))
+
+    for page in SUITE_PAGES:
+        app = _page_app(page, now)
+        timings[f"page_cold:{page}"] = timeit(lambda: (clear_cache(), _run_page(app)), repeat=3)
+        timings[f"page_rerun:{page}"] = timeit(_run_page, app, repeat=3)
+    return timings
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(output=None, seasons=SUITE_SEASONS):
+    results = {"created": datetime.now().isoformat(timespec="seconds"), "commit": _git_commit(),
+               "python": platform.python_version(), "scenarios": []}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_teams, n_rounds, density in seasons:
+            target, summary, now = _suite_season(tmp, n_teams, n_rounds, density)
+            clear_cache()
+            os.chdir(target)
+            try:
+                timings = suite_timings(now)
+            finally:
+                os.chdir(cwd)
+            results["scenarios"].append({**summary, "timings": timings})
+            print(f"  {n_teams} команд, {n_rounds} туров, плотность {density:g} "
+                  f"({summary['matches']} матчей, {summary['events']} событий):")
+            for metric, seconds in timings.items():
+                print(f"    {metric:<28} {seconds * 1000:9.2f} мс")
+    clear_cache()
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результаты записаны: {output}")
+    return results
+
+
+def memory_sizes():
+    # Байты в текущем каталоге данных: разобранный squads.json против неизменяемой модели составов
+    squads = read_json(SQUADS_FILE)
+    return {"squads": deep_size(squads)}, {"squads": deep_size(build_squads(squads))}
+
+
+def bench_memory(seasons=SUITE_SEASONS):
+    # Модель общая для всех сессий, поэтому на сессию она не добавляет ничего; сравниваем объём одной копии
+    cwd = os.getcwd()
+    print("Память: словари JSON против модели составов season_model")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_teams, n_rounds, density in seasons:
+            target, summary, _ = _suite_season(tmp, n_teams, n_rounds, density)
+            os.chdir(target)
+            try:
+                raw, model = memory_sizes()
+            finally:
+                os.chdir(cwd)
+            print(f"  {n_teams} команд, {n_rounds} туров, плотность {density:g} ({summary['events']} событий):")
+            for part in model:
+                saved = 1 - model[part] / raw[part]
+                print(f"    {part:<8} {raw[part] / 1024:9.1f} КБ -> {model[part] / 1024:9.1f} КБ "
+                      f"(экономия {saved:.0%})")
+    clear_cache()
+
+
+def compare(old_path, new_path):
+    # Отношение времени нового прогона к старому; медленнее на 20% и больше — регрессия
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    regressions = 0
+
+    def key(scenario):
+        return scenario["teams"], scenario["rounds"], scenario["density"]
+
+    old_scenarios = {key(scenario): scenario for scenario in old["scenarios"]}
+    for scenario in new["scenarios"]:
+        before = old_scenarios.get(key(scenario))
+        if before is None:
+            continue
+        print(f"  {scenario['teams']} команд, {scenario['rounds']} туров, плотность {scenario['density']:g}:")
+        for metric, seconds in scenario["timings"].items():
+            if metric not in before["timings"]:
+                continue
+            ratio = seconds / before["timings"][metric]
+            mark = " ← регрессия" if ratio >= REGRESSION_RATIO else ""
+            regressions += bool(mark)
+            print(f"    {metric:<28} {before['timings'][metric] * 1000:9.2f} -> {seconds * 1000:9.2f} мс "
+                  f"(x{ratio:.2f}){mark}")
+    return regressions
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["suite"]:
+        run_suite(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif sys.argv[1:2] == ["memory"]:
+        bench_memory()
+    elif sys.argv[1:2] == ["compare"] and len(sys.argv) == 4:
+        sys.exit(1 if compare(sys.argv[2], sys.argv[3]) else 0)
+    else:
+        bench_standings()
+        bench_standings_store()
+        bench_progression()
+        bench_event_store()
+        bench_event_log()
+        bench_player_search()
+        bench_player_log()
+        bench_simulation()
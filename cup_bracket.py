@@ -0,0 +1,187 @@
+"""Сетка кубка одним HTML-блоком.
+
+Матчи каждой стадии объединяются в пары по двум встречам, для пары считается
+сумма, победитель и путь обладателя кубка. Статистика матча раскрывается
+элементом <details> прямо в браузере, без перезапуска скрипта. Готовый HTML
+кэшируется до изменения cup_matches.json или cup_match_stats.json.
+"""
+import re
+from html import escape
+
+from data_loader import CUP_MATCH_STATS_FILE, CUP_MATCHES_FILE, cached_derived, load_cup_matches
+from match_index import cup_index, cup_key
+
+STAGES = ["1/8 финала", "1/4 финала", "1/2 финала", "Финал"]
+
+_SCORE = re.compile(r"^\s*(\d+)\s*:\s*(\d+)(.*)$")
+_PENALTIES = re.compile(r"пен\.?\s*(\d+)\s*:\s*(\d+)", re.IGNORECASE)
+
+CSS = """
+<style>
+    .cup-bracket { display: flex; gap: 16px; overflow-x: auto; padding-bottom: 8px; }
+    .cup-stage { flex: 1 0 230px; display: flex; flex-direction: column; justify-content: space-around; gap: 12px; }
+    .cup-header { font-size: 18px; font-weight: bold; color: #2c3e50; border-bottom: 2px solid #ff4b4b;
+                  padding-bottom: 5px; margin-bottom: 4px; }
+    .cup-tie { border: 1px solid #dee2e6; border-radius: 8px; background: #f8f9fa; padding: 8px 10px; }
+    .cup-team { display: flex; justify-content: space-between; font-size: 15px; }
+    .cup-winner { color: green; font-weight: bold; }
+    .cup-legs { font-size: 12px; color: #6c757d; margin-top: 4px; }
+    .cup-tie details { font-size: 12px; margin-top: 2px; }
+    .cup-tie summary { cursor: pointer; }
+    .cup-tie table { border-collapse: collapse; margin: 4px 0; width: 100%; }
+    .cup-tie td, .cup-tie th { padding: 1px 4px; border-bottom: 1px solid #eee; }
+    .cup-tie th { text-align: left; font-weight: 500; color: #666; }
+    .cup-champion { margin-top: 14px; padding: 10px; border-radius: 8px; background: #fff8e1;
+                    border: 1px solid #ffe082; }
+</style>
+"""
+
+
+def parse_score(score):
+    # "3:4 (пен. 2:4)" -> (3, 4, 2, 4); "3:1 (После ДВ)" -> (3, 1, None, None); нераспознанное -> None
+    match = _SCORE.match(score or "")
+    if not match:
+        return None
+    hg, ag, rest = match.groups()
+    penalties = _PENALTIES.search(rest)
+    if penalties:
+        return int(hg), int(ag), int(penalties.group(1)), int(penalties.group(2))
+    return int(hg), int(ag), None, None
+
+
+class Tie:
+    """Пара команд на стадии: одна или две встречи."""
+
+    def __init__(self, stage, first, second):
+        self.stage = stage
+        self.teams = (first, second)
+        self.legs = []
+
+    def add_leg(self, fixture):
+        self.legs.append(fixture)
+
+    def aggregate(self):
+        # Сумма по встречам и серия пенальти последней встречи (в порядке self.teams)
+        goals = {team: 0 for team in self.teams}
+        penalties = None
+        played = 0
+        for leg in self.legs:
+            parsed = parse_score(leg["score"])
+            if parsed is None:
+                continue
+            played += 1
+            hg, ag, ph, pa = parsed
+            goals[leg["home"]] += hg
+            goals[leg["away"]] += ag
+            if ph is not None:
+                penalties = {leg["home"]: ph, leg["away"]: pa}
+        return played, goals, penalties
+
+    def winner(self):
+        # Победитель определяется, когда сыграны все встречи пары
+        played, goals, penalties = self.aggregate()
+        if not played or played < len(self.legs):
+            return None
+        first, second = self.teams
+        if goals[first] != goals[second]:
+            return first if goals[first] > goals[second] else second
+        if penalties and penalties[first] != penalties[second]:
+            return first if penalties[first] > penalties[second] else second
+        return None
+
+
+def build_ties(cup_matches):
+    ties = {stage: {} for stage in STAGES}
+    for fixture in cup_matches:
+        stage_ties = ties.setdefault(fixture["stage"], {})
+        pair = frozenset((fixture["home"], fixture["away"]))
+        if pair not in stage_ties:
+            stage_ties[pair] = Tie(fixture["stage"], fixture["home"], fixture["away"])
+        stage_ties[pair].add_leg(fixture)
+    return {stage: list(stage_ties.values()) for stage, stage_ties in ties.items()}
+
+
+def winners_path(ties):
+    # Путь обладателя кубка: пары, выигранные победителем финала, по стадиям
+    final = [tie for tie in ties.get(STAGES[-1], []) if tie.winner()]
+    if not final:
+        return None, []
+    champion = final[0].winner()
+    path = [tie for stage in STAGES for tie in ties.get(stage, []) if tie.winner() == champion]
+    return champion, path
+
+
+def _events_table(title, rows, headers=None):
+    # Строка: команда, игрок, минута и дополнительные поля (у голов — ассистент)
+    if not rows:
+        return ""
+    head = "<tr>" + "".join(f"<th>{escape(header)}</th>" for header in headers) + "</tr>" if headers else ""
+    body = "".join(f"<tr><td>{escape(str(team))}</td><td>{escape(str(player or '—'))}</td>"
+                   f"<td>{escape(str(minute)) + '′' if minute is not None else ''}</td>"
+                   + "".join(f"<td>{escape(str(value or '—'))}</td>" for value in extra) + "</tr>"
+                   for team, player, minute, *extra in rows)
+    return f"<b>{title}</b><table>{head}{body}</table>"
+
+
+def _leg_details(leg, stats):
+    if not stats:
+        return ""
+    goals = [(g["team"], g.get("player"), g.get("minute"), g.get("assist")) for g in stats.get("goals", [])]
+    yellow = [(c["team"], c["player"], c.get("minute")) for c in stats.get("yellow_cards", [])]
+    red = [(c["team"], c["player"], c.get("minute")) for c in stats.get("red_cards", [])]
+    content = _events_table("Голы", goals, ("Команда", "Игрок", "Минута", "Ассистент")) + \
+        _events_table("Жёлтые карточки", yellow) + \
+        _events_table("Красные карточки", red)
+    if not content:
+        return ""
+    return (f"<details><summary>📊 {escape(leg['date'])}: {escape(leg['home'])} – {escape(leg['away'])}"
+            f"</summary>{content}</details>")
+
+
+def _tie_html(tie, index):
+    played, goals, penalties = tie.aggregate()
+    winner = tie.winner()
+    rows = []
+    for team in tie.teams:
+        css = ' class="cup-winner"' if team == winner else ""
+        total = str(goals[team]) if played else ""
+        if penalties:
+            total += f" ({penalties[team]})"
+        rows.append(f'<div class="cup-team"><span{css}>{escape(team)}</span><span>{total}</span></div>')
+    legs = "<br>".join(f"{escape(leg['date'])}: {escape(leg['home'])} – {escape(leg['away'])} "
+                       f"<b>{escape(leg['score'] or '—')}</b>" for leg in tie.legs)
+    details = "".join(_leg_details(leg, index.get(cup_key(leg["home"], leg["away"], leg["date"])))
+                      for leg in tie.legs if leg["score"])
+    return f'<div class="cup-tie">{"".join(rows)}<div class="cup-legs">{legs}</div>{details}</div>'
+
+
+def render_bracket(cup_matches, index):
+    ties = build_ties(cup_matches)
+    stages = STAGES + [stage for stage in ties if stage not in STAGES]
+    columns = "".join(
+        f'<div class="cup-stage"><div class="cup-header">{escape(stage)}</div>'
+        f'{"".join(_tie_html(tie, index) for tie in ties.get(stage, []))}</div>'
+        for stage in stages)
+
+    champion, path = winners_path(ties)
+    champion_html = ""
+    if champion:
+        steps = []
+        for tie in path:
+            _, goals, penalties = tie.aggregate()
+            rival = tie.teams[1] if tie.teams[0] == champion else tie.teams[0]
+            score = f"{goals[champion]}:{goals[rival]}"
+            if penalties:
+                score += f", пен. {penalties[champion]}:{penalties[rival]}"
+            steps.append(f"{escape(tie.stage)} — {escape(rival)} ({score})")
+        champion_html = (f'<div class="cup-champion">🏆 Обладатель кубка: <b>{escape(champion)}</b><br>'
+                         f'Путь к трофею: {" → ".join(steps)}</div>')
+
+    return f'{CSS}<div class="cup-bracket">{columns}</div>{champion_html}'
+
+
+def bracket_html(cup_matches_path=CUP_MATCHES_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    # cup_match_stats_path=None — сетка без статистики матчей
+    paths = (cup_matches_path,) if cup_match_stats_path is None else (cup_matches_path, cup_match_stats_path)
+    return cached_derived("cup_bracket", paths, lambda: render_bracket(
+        load_cup_matches(cup_matches_path), cup_index(cup_match_stats_path) if cup_match_stats_path else {}))
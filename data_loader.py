@@ -0,0 +1,352 @@
+"""Загрузка файлов данных сайта с общим для всех сессий кэшем.
+
+Каждый файл разбирается один раз; повторные обращения из любой сессии получают
+готовый результат, пока у файла не изменятся время модификации или размер.
+Возвращаемые объекты общие — изменять их на месте нельзя, только копировать.
+
+Кэши ограничены по числу записей и вытесняют давно не использованные (LRU),
+поэтому память не растёт по мере того, как посетители открывают архивные сезоны.
+
+Версию файла по умолчанию даёт os.stat при каждом обращении. Если запущен watcher.py,
+версии берутся из памяти наблюдателя, а он сам вызывает refresh() для изменённого файла.
+
+Статистика матчей может храниться журналом JSON Lines (match_stats.jsonl — один матч
+в строке, новые матчи дописываются в конец, см. event_log.py). Журнал разбирается
+с места, где остановилось прошлое чтение: запоминаются смещение и последние байты до
+него, и если файл вырос, а эти байты не изменились, читаются только дописанные строки.
+Файл, который заменён (другой inode), стал короче или изменился без роста (правка на
+месте), разбирается целиком. Правка прежних строк вместе с дописыванием не замечается,
+если байты перед смещением остались прежними, — журнал правят только дописыванием,
+а переписывают целиком через event_log.py.
+
+Если ingest.py проверил файлы и записал снимок (.compiled/<файл>.pickle рядом с файлом),
+загружается готовый разобранный объект; снимок, записанный для другой версии файла,
+не используется — файл разбирается заново.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+MATCHES_FILE = "matches.csv"
+SCHEDULE_FILE = "schedule.csv"
+SQUADS_FILE = "squads.json"
+MATCH_STATS_FILE = "match_stats.json"
+CUP_MATCHES_FILE = "cup_matches.json"
+CUP_MATCH_STATS_FILE = "cup_match_stats.json"
+EVENT_LOG_SUFFIX = ".jsonl"
+
+COMPILED_DIR = ".compiled"
+# Меняется вместе с форматом разобранных таблиц, чтобы старые снимки не использовались
+COMPILED_FORMAT = 2
+
+# Файлы одного сезона: шесть файлов данных и манифест; держим несколько сезонов
+MAX_CACHED_FILES = 32
+MAX_CACHED_DERIVED = 64
+
+# Сколько байт перед смещением журнала сверяется, чтобы заметить переписанный файл
+TAIL_CHECK_BYTES = 256
+
+logger = logging.getLogger(__name__)
+
+_cache = OrderedDict()
+_derived = OrderedDict()
+_parsers = {}
+_builders = {}
+_refresh_listeners = []
+_tails = OrderedDict()
+_lock = threading.Lock()
+_tail_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+_version_source = None
+
+
+def set_version_source(source):
+    # source(path) -> версия файла или None, если путь ему неизвестен; нет файла — FileNotFoundError
+    global _version_source
+    _version_source = source
+
+
+def file_version(path):
+    # Ключ версии файла: изменение содержимого меняет mtime и почти всегда размер
+    if _version_source is not None:
+        version = _version_source(path)
+        if version is not None:
+            return version
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_exists(path):
+    try:
+        file_version(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def data_version(*paths):
+    # Совокупная версия нескольких файлов — ключ для производных кэшей
+    return tuple((path, file_version(path)) for path in paths)
+
+
+def _lru_get(cache, cache_key, version):
+    entry = cache.get(cache_key)
+    if entry is None or entry[0] != version:
+        return None
+    cache.move_to_end(cache_key)
+    return entry
+
+
+def _lru_put(cache, cache_key, version, value, limit):
+    cache[cache_key] = (version, value)
+    cache.move_to_end(cache_key)
+    while len(cache) > limit:
+        cache.popitem(last=False)
+
+
+def compiled_path(path):
+    return os.path.join(os.path.dirname(path), COMPILED_DIR, f"{os.path.basename(path)}.pickle")
+
+
+def write_compiled(path, value):
+    # Снимок разобранного файла для текущей версии файла (пишет ingest.py после проверки)
+    target = compiled_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = f"{target}.part"
+    with open(partial, "wb") as f:
+        pickle.dump({"format": COMPILED_FORMAT, "source_version": file_version(path), "value": value}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(partial, target)
+    return target
+
+
+def _load_compiled(path, version):
+    # None, если снимка нет или он записан для другой версии исходного файла
+    target = compiled_path(path)
+    if not file_exists(target):
+        return None
+    try:
+        with open(target, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        logger.warning("Снимок %s не читается, файл будет разобран заново", target)
+        return None
+    if snapshot.get("format") != COMPILED_FORMAT or snapshot.get("source_version") != version:
+        return None
+    return snapshot["value"]
+
+
+def read_compiled(path, parse):
+    # Разобранный файл без общего кэша: из снимка ingest.py, если он для текущей версии, иначе parse(path)
+    value = _load_compiled(path, file_version(path))
+    return parse(path) if value is None else value
+
+
+def _cached(path, parse):
+    key = file_version(path)
+    with _lock:
+        entry = _lru_get(_cache, path, key)
+        if entry is not None:
+            _hits[path] += 1
+            return entry[1]
+
+    value = _load_compiled(path, key)
+    if value is None:
+        value = parse(path)
+    with _lock:
+        _lru_put(_cache, path, key, value, MAX_CACHED_FILES)
+        _parsers[path] = parse
+        _misses[path] += 1
+    return value
+
+
+def cached_derived(name, paths, build):
+    # Производная структура (индекс, агрегат), пересобираемая только при смене версии
+    # исходных файлов; name различает структуры, построенные по одним и тем же файлам
+    key = data_version(*paths)
+    with _lock:
+        entry = _lru_get(_derived, (name, paths), key)
+        if entry is not None:
+            return entry[1]
+
+    value = build()
+    with _lock:
+        _lru_put(_derived, (name, paths), key, value, MAX_CACHED_DERIVED)
+        _builders[(name, paths)] = build
+        for stale in [cache_key for cache_key in _builders if cache_key not in _derived]:
+            del _builders[stale]
+    return value
+
+
+def on_refresh(listener):
+    # listener(path) вызывается после refresh(path), например для хранилищ вне этого модуля
+    _refresh_listeners.append(listener)
+
+
+def refresh(path):
+    # Заранее пересобрать после изменения файла сам файл и только зависящие от него структуры,
+    # чтобы следующий перезапуск страницы получил готовый результат
+    with _lock:
+        parse = _parsers.get(path) if path in _cache else None
+        dependents = [(cache_key, _builders[cache_key]) for cache_key in _derived
+                      if path in cache_key[1] and cache_key in _builders]
+    rebuilt = 0
+    try:
+        if parse is not None:
+            _cached(path, parse)
+            rebuilt += 1
+        for (name, paths), build in dependents:
+            cached_derived(name, paths, build)
+            rebuilt += 1
+        for listener in _refresh_listeners:
+            listener(path)
+    except Exception:
+        # Файл сохранён не полностью или с ошибкой — страница покажет её при обращении
+        logger.warning("Не удалось пересобрать данные после изменения %s", path, exc_info=True)
+    return rebuilt
+
+
+def _hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    # Хэш содержимого файла (для сильных ETag); пересчитывается только при смене версии файла
+    return cached_derived("file_hash", (path,), lambda: _hash_file(path))
+
+
+def read_json(path):
+    # Без кэша: для структур, которые хранят разобранные данные в своём виде (season_model.py)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def is_event_log(path):
+    return path.endswith(EVENT_LOG_SUFFIX)
+
+
+def _parse_lines(path, data, first_line):
+    records = []
+    for number, line in enumerate(data.split(b"\n"), first_line):
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{path}, строка {number}: {e}") from None
+    return records
+
+
+def read_event_log(path):
+    # Журнал матчей целиком: {"matches": [...]} — как у match_stats.json
+    with open(path, 'rb') as f:
+        return {"matches": _parse_lines(path, f.read(), 1)}
+
+
+def _read_event_log_tail(path):
+    # Разбор только строк, дописанных после прошлого чтения. Последняя строка без перевода
+    # строки разбирается, но смещение за неё не переносится; если она не разбирается, запись
+    # ещё идёт — строка пропускается до следующего чтения (ingest.py читает журнал целиком и сообщит об ошибке)
+    with _tail_lock, open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        offset, lines, check, records = 0, 0, b"", []
+        state = _tails.get(path)
+        # Файл изменён, но не вырос — правка на месте: разбирается целиком
+        if state is not None and state[0] == stat.st_ino and (stat.st_size > state[1] or stat.st_mtime_ns == state[2]):
+            f.seek(max(0, state[3] - len(state[5])))
+            if f.read(len(state[5])) == state[5]:
+                offset, lines, check, records = state[3:]
+        f.seek(offset)
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete:
+            # Список копируется, только если есть новые строки: прежний мог уже уйти в общий кэш
+            records = records + _parse_lines(path, data[:complete], lines + 1)
+            offset += complete
+            lines += data.count(b"\n", 0, complete)
+            f.seek(max(0, offset - TAIL_CHECK_BYTES))
+            check = f.read(offset - f.tell())
+        _tails[path] = (stat.st_ino, stat.st_size, stat.st_mtime_ns, offset, lines, check, records)
+        _tails.move_to_end(path)
+        while len(_tails) > MAX_CACHED_FILES:
+            _tails.popitem(last=False)
+    try:
+        pending = _parse_lines(path, data[complete:], lines + 1)
+    except ValueError:
+        logger.info("Последняя строка %s ещё дописывается", path)
+        pending = []
+    return {"matches": records + pending if pending else records}
+
+
+def _read_match_stats(path):
+    return _read_event_log_tail(path) if is_event_log(path) else read_json(path)
+
+
+def _read_matches(path):
+    # Счёт проверяет ingest.py; здесь он читается как есть: пусто — матч не сыгран, иное — ошибка
+    return pd.read_csv(path, encoding='utf-8-sig', na_values=['', ' '],
+                       dtype={"Голы хозяев": "Int64", "Голы гостей": "Int64"})
+
+
+def _read_schedule(path):
+    return pd.read_csv(path, encoding='utf-8-sig')
+
+
+def parser_for(path):
+    # Разбор файла так же, как при загрузке; ingest.py пишет в снимок именно этот результат
+    if is_event_log(path):
+        return read_event_log
+    return {MATCHES_FILE: _read_matches, SCHEDULE_FILE: _read_schedule}.get(os.path.basename(path), read_json)
+
+
+def load_json(path):
+    return _cached(path, read_json)
+
+
+def load_matches(path=MATCHES_FILE):
+    return _cached(path, _read_matches)
+
+
+def load_schedule(path=SCHEDULE_FILE):
+    return _cached(path, _read_schedule)
+
+
+def load_match_stats(path=MATCH_STATS_FILE):
+    return _cached(path, _read_match_stats)
+
+
+def load_cup_matches(path=CUP_MATCHES_FILE):
+    return _cached(path, read_json)
+
+
+def load_cup_match_stats(path=CUP_MATCH_STATS_FILE):
+    return _cached(path, _read_match_stats)
+
+
+def cache_stats():
+    # Счётчики попаданий и промахов по каждому файлу
+    with _lock:
+        paths = sorted(set(_hits) | set(_misses))
+        return {path: {"hits": _hits[path], "misses": _misses[path], "cached": path in _cache} for path in paths}
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _derived.clear()
+        _parsers.clear()
+        _builders.clear()
+        _hits.clear()
+        _misses.clear()
+    with _tail_lock:
+        _tails.clear()
@@ -0,0 +1,182 @@
+"""Дисквалификации игроков по карточкам чемпионата и кубка.
+
+Сыгранные матчи обрабатываются по порядку (чемпионат — по турам, кубок — по датам):
+сначала команды матча отбывают текущие дисквалификации, затем начисляются карточки
+матча. За YELLOW_LIMIT жёлтых карточек подряд в турнире — YELLOW_BAN матчей,
+за удаление (красная или две жёлтые в одном матче) — SENDING_OFF_BAN. Дисквалификация
+отбывается в том же турнире, где получена.
+
+Трекер хранит состояние после последнего обработанного матча: новые сыгранные
+матчи (следующий тур) дообрабатываются без повторного прохода по сезону; если
+изменился уже обработанный матч, сезон пересчитывается целиком. Статус игрока
+и список дисквалифицированных команды — поиск в dict.
+"""
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from cup_bracket import parse_score
+from data_loader import data_version, load_cup_matches, load_matches, on_refresh
+from match_index import cup_index, cup_key, league_index, league_key
+from player_stats import CUP, LEAGUE
+
+YELLOW_LIMIT = 3
+YELLOW_BAN = 1
+SENDING_OFF_BAN = 1
+
+
+class PlayerDiscipline:
+    """Карточки и дисквалификация игрока в одном турнире."""
+
+    __slots__ = ("team", "player", "yellows", "yellow_total", "red_total", "bans", "remaining", "served", "reason")
+
+    def __init__(self, team, player):
+        self.team = team
+        self.player = player
+        self.yellows = 0
+        self.yellow_total = 0
+        self.red_total = 0
+        self.bans = 0
+        self.remaining = 0
+        self.served = 0
+        self.reason = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DisciplineTracker:
+    """Состояние дисквалификаций одного турнира с дообработкой новых матчей."""
+
+    def __init__(self):
+        self.players = {}
+        self._suspended = {}
+        self._applied = []
+
+    def _serve(self, team):
+        suspended = self._suspended.get(team)
+        if not suspended:
+            return
+        for player in list(suspended):
+            record = self.players[team, player]
+            record.remaining -= 1
+            record.served += 1
+            if not record.remaining:
+                suspended.discard(player)
+
+    def _apply(self, fixture):
+        home, away, cards = fixture
+        self._serve(home)
+        self._serve(away)
+        colors = Counter(cards)
+        for team, player in dict.fromkeys((team, player) for team, player, _ in cards):
+            yellow, red = colors[team, player, "yellow"], colors[team, player, "red"]
+            record = self.players.get((team, player))
+            if record is None:
+                record = self.players[team, player] = PlayerDiscipline(team, player)
+            record.yellow_total += yellow
+            record.red_total += red
+            ban = 0
+            if red or yellow >= 2:
+                ban, record.reason = SENDING_OFF_BAN, "удаление"
+            elif yellow:
+                record.yellows += 1
+                if record.yellows >= YELLOW_LIMIT:
+                    record.yellows -= YELLOW_LIMIT
+                    ban, record.reason = YELLOW_BAN, f"{YELLOW_LIMIT} жёлтые карточки"
+            if ban:
+                record.bans += 1
+                record.remaining += ban
+                self._suspended.setdefault(team, set()).add(player)
+
+    def update(self, fixtures):
+        # fixtures — сыгранные матчи по порядку: (хозяева, гости, карточки (команда, игрок, цвет));
+        # возвращает число обработанных матчей
+        known = len(self._applied)
+        if fixtures[:known] != self._applied:
+            self.players, self._suspended, self._applied, known = {}, {}, [], 0
+        for fixture in fixtures[known:]:
+            self._apply(fixture)
+        self._applied = list(fixtures)
+        return len(fixtures) - known
+
+    def status(self, team, player):
+        return self.players.get((team, player))
+
+    def suspended(self, team):
+        # Дисквалифицированные игроки команды на её следующий матч
+        return [self.players[team, player] for player in sorted(self._suspended.get(team, ()))]
+
+
+def _cards(record):
+    if record is None:
+        return ()
+    return tuple((card["team"], card["player"], color) for color in ("yellow", "red")
+                 for card in record.get(f"{color}_cards", []))
+
+
+def league_fixtures(matches_path, match_stats_path):
+    matches = load_matches(matches_path).dropna(subset=["Голы хозяев", "Голы гостей"])
+    matches = matches.sort_values("Тур", kind="stable")
+    index = league_index(match_stats_path)
+    return [(home, away, _cards(index.get(league_key(home, away, round_))))
+            for round_, home, away in zip(matches["Тур"], matches["Хозяева"], matches["Гости"])]
+
+
+def cup_fixtures(cup_matches_path, cup_match_stats_path):
+    played = [fixture for fixture in load_cup_matches(cup_matches_path) if parse_score(fixture.get("score"))]
+    played.sort(key=lambda fixture: datetime.strptime(fixture["date"], "%d.%m.%Y"))
+    index = cup_index(cup_match_stats_path)
+    return [(fixture["home"], fixture["away"], _cards(index.get(cup_key(fixture["home"], fixture["away"],
+                                                                         fixture["date"]))))
+            for fixture in played]
+
+
+class Discipline:
+    """Трекеры чемпионата и кубка одного раздела."""
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.version = None
+        self.trackers = {LEAGUE: DisciplineTracker(), CUP: DisciplineTracker()}
+
+    def update(self):
+        matches_path, match_stats_path, cup_matches_path, cup_match_stats_path = self.sources
+        processed = self.trackers[LEAGUE].update(league_fixtures(matches_path, match_stats_path))
+        processed += self.trackers[CUP].update(cup_fixtures(cup_matches_path, cup_match_stats_path))
+        return processed
+
+    def suspended(self, competition, teams):
+        return [record for team in teams for record in self.trackers[competition].suspended(team)]
+
+
+# Трекеры по разделам; давно не открывавшиеся вытесняются, как хранилища таблицы
+MAX_TRACKERS = 8
+
+_trackers = OrderedDict()
+_trackers_lock = threading.Lock()
+
+
+def discipline(sources):
+    # Общий для всех сессий трекер раздела; sources — Partition.event_sources
+    version = data_version(*sources)
+    with _trackers_lock:
+        tracker = _trackers.setdefault(sources, Discipline(sources))
+        _trackers.move_to_end(sources)
+        while len(_trackers) > MAX_TRACKERS:
+            _trackers.popitem(last=False)
+        if tracker.version != version:
+            tracker.update()
+            tracker.version = version
+    return tracker
+
+
+def _refresh_trackers(path):
+    # После изменения файла (watcher.py) дообработать открытые трекеры заранее
+    with _trackers_lock:
+        affected = [sources for sources in _trackers if path in sources]
+    for sources in affected:
+        discipline(sources)
+
+
+on_refresh(_refresh_trackers)
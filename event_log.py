@@ -0,0 +1,72 @@
+"""Журнал статистики матчей в формате JSON Lines: один матч — одна строка.
+
+match_stats.json — один документ: чтобы добавить матч, файл переписывается целиком,
+а сайт разбирает его заново. В журнале (match_stats.jsonl) новый матч дописывается
+в конец, и data_loader разбирает только дописанные строки. Запись матча в строке —
+та же, что в списке "matches" файла JSON. Если рядом с match_stats.json или
+cup_match_stats.json лежит одноимённый файл .jsonl, сайт берёт данные из него (seasons.py).
+
+    python event_log.py convert match_stats.json            # → match_stats.jsonl
+    python event_log.py append match_stats.jsonl матч.json  # матч или список матчей
+"""
+import argparse
+import json
+import os
+
+from data_loader import EVENT_LOG_SUFFIX, read_json
+
+
+def event_log_path(path):
+    return os.path.splitext(path)[0] + EVENT_LOG_SUFFIX
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def write_event_log(path, records):
+    # Журнал целиком (при конвертации); заменяет файл атомарно, чтобы сайт не прочитал его наполовину
+    partial = f"{path}.part"
+    with open(partial, "w", encoding="utf-8", newline="\n") as f:
+        f.writelines(_line(record) for record in records)
+    os.replace(partial, path)
+
+
+def append_matches(path, records):
+    # Дописать матчи одной записью в конец журнала; если последняя строка не завершена, она закрывается
+    data = "".join(_line(record) for record in records).encode("utf-8")
+    with open(path, "ab+") as f:
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+    return len(records)
+
+
+def convert(source, target=None):
+    # match_stats.json → журнал JSON Lines; исходный файл не удаляется
+    target = target or event_log_path(source)
+    records = read_json(source)["matches"]
+    write_event_log(target, records)
+    return target, len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Журнал статистики матчей JSON Lines")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="файл match_stats.json в журнал .jsonl")
+    convert_parser.add_argument("source")
+    convert_parser.add_argument("target", nargs="?")
+    append_parser = commands.add_parser("append", help="дописать матчи из файла JSON в журнал")
+    append_parser.add_argument("log")
+    append_parser.add_argument("matches", help="файл с матчем, списком матчей или {\"matches\": [...]}")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        written, count = convert(args.source, args.target)
+        print(f"{written}: матчей {count}")
+    else:
+        new = read_json(args.matches)
+        new = new.get("matches", [new]) if isinstance(new, dict) else new
+        print(f"{args.log}: дописано матчей {append_matches(args.log, new)}")
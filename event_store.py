@@ -0,0 +1,256 @@
+"""Хранилища событий матчей (голы, передачи, карточки) для страниц статистики.
+
+По умолчанию события читаются из match_stats.json и cup_match_stats.json через
+индексы match_index. Если задана переменная окружения FOOTBALL_SQLITE_DB, используется
+база SQLite с нормализованной схемой и индексами; при изменении исходных файлов
+она переимпортируется автоматически.
+
+Если сезонов несколько (см. seasons.py), в пути к базе можно указать "{partition}",
+например FOOTBALL_SQLITE_DB=data/events-{partition}.db.
+
+Импорт вручную: python event_store.py football.db
+"""
+import os
+import sqlite3
+import sys
+import threading
+from collections import defaultdict
+
+import pandas as pd
+
+from data_loader import (CUP_MATCH_STATS_FILE, CUP_MATCHES_FILE, MATCH_STATS_FILE, MATCHES_FILE, data_version,
+                         load_cup_match_stats, load_cup_matches, load_match_stats, load_matches)
+from match_index import cup_index, cup_key, league_index, league_key
+from player_stats import CUP, LEAGUE, competition_totals, event_registry, merge_name_variants
+
+SOURCE_FILES = (MATCHES_FILE, MATCH_STATS_FILE, CUP_MATCHES_FILE, CUP_MATCH_STATS_FILE)
+
+PLAYER_TOTALS_COLUMNS = ["name", "team", "goals", "assists", "yellow_cards", "red_cards"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    competition TEXT NOT NULL CHECK (competition IN ('league', 'cup')),
+    round INTEGER,
+    stage TEXT,
+    date TEXT,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    score TEXT
+);
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY,
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    team TEXT NOT NULL,
+    player TEXT,
+    minute INTEGER
+);
+CREATE TABLE IF NOT EXISTS assists (
+    goal_id INTEGER NOT NULL REFERENCES goals (id),
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    team TEXT NOT NULL,
+    player TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    color TEXT NOT NULL CHECK (color IN ('yellow', 'red')),
+    team TEXT NOT NULL,
+    player TEXT NOT NULL,
+    minute INTEGER
+);
+CREATE INDEX IF NOT EXISTS matches_home ON matches (competition, home_team, away_team);
+CREATE INDEX IF NOT EXISTS matches_away ON matches (competition, away_team);
+CREATE INDEX IF NOT EXISTS matches_round ON matches (competition, round);
+CREATE INDEX IF NOT EXISTS matches_date ON matches (competition, date);
+CREATE INDEX IF NOT EXISTS goals_match ON goals (match_id);
+CREATE INDEX IF NOT EXISTS goals_player ON goals (player, team);
+CREATE INDEX IF NOT EXISTS goals_team ON goals (team);
+CREATE INDEX IF NOT EXISTS assists_player ON assists (player, team);
+CREATE INDEX IF NOT EXISTS cards_match ON cards (match_id);
+CREATE INDEX IF NOT EXISTS cards_player ON cards (player, team);
+CREATE INDEX IF NOT EXISTS cards_team ON cards (team);
+"""
+
+
+def _empty_totals():
+    return pd.DataFrame(columns=PLAYER_TOTALS_COLUMNS)
+
+
+class JsonEventStore:
+    """События из JSON-файлов через индексы по ключу матча."""
+
+    def __init__(self, match_stats_path=MATCH_STATS_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+        self.match_stats_path = match_stats_path
+        self.cup_match_stats_path = cup_match_stats_path
+
+    def ensure_loaded(self, competition):
+        # Индекс строится заранее, чтобы отсутствие файла обнаружилось до отрисовки страницы
+        if competition == LEAGUE:
+            league_index(self.match_stats_path)
+        else:
+            cup_index(self.cup_match_stats_path)
+        return self
+
+    def match_events(self, competition, home, away, round_=None, date=None):
+        if competition == LEAGUE:
+            return league_index(self.match_stats_path).get(league_key(home, away, round_))
+        return cup_index(self.cup_match_stats_path).get(cup_key(home, away, date))
+
+    def player_totals(self, competition):
+        return competition_totals(competition, self.match_stats_path, self.cup_match_stats_path)
+
+
+def import_files(conn, matches_path=MATCHES_FILE, match_stats_path=MATCH_STATS_FILE,
+                 cup_matches_path=CUP_MATCHES_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    # Полный импорт: события из *_stats.json, матчи без событий — из matches.csv и cup_matches.json
+    conn.executescript(SCHEMA)
+    with conn:
+        for table in ("cards", "assists", "goals", "matches", "meta"):
+            conn.execute(f"DELETE FROM {table}")
+
+        league_records = load_match_stats(match_stats_path)["matches"]
+        cup_records = load_cup_match_stats(cup_match_stats_path)["matches"]
+        seen_league = {league_key(m["home_team"], m["away_team"], m["round"]) for m in league_records}
+        seen_cup = {cup_key(m["home_team"], m["away_team"], m["date"]) for m in cup_records}
+
+        for competition, records in ((LEAGUE, league_records), (CUP, cup_records)):
+            for record in records:
+                match_id = conn.execute(
+                    "INSERT INTO matches (competition, round, stage, date, home_team, away_team, score) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (competition, record.get("round"), record.get("stage"), record.get("date"),
+                     record["home_team"], record["away_team"], record.get("score"))).lastrowid
+                for goal in record.get("goals", []):
+                    goal_id = conn.execute(
+                        "INSERT INTO goals (match_id, team, player, minute) VALUES (?, ?, ?, ?)",
+                        (match_id, goal["team"], goal["player"], goal.get("minute"))).lastrowid
+                    if goal.get("assist"):
+                        conn.execute("INSERT INTO assists (goal_id, match_id, team, player) VALUES (?, ?, ?, ?)",
+                                     (goal_id, match_id, goal["team"], goal["assist"]))
+                for color in ("yellow", "red"):
+                    conn.executemany(
+                        "INSERT INTO cards (match_id, color, team, player, minute) VALUES (?, ?, ?, ?, ?)",
+                        [(match_id, color, card["team"], card["player"], card.get("minute"))
+                         for card in record.get(f"{color}_cards", [])])
+
+        played = load_matches(matches_path).dropna(subset=["Голы хозяев", "Голы гостей"])
+        conn.executemany(
+            "INSERT INTO matches (competition, round, home_team, away_team, score) VALUES ('league', ?, ?, ?, ?)",
+            [(int(round_), home, away, f"{int(hg)}:{int(ag)}")
+             for round_, home, away, hg, ag in zip(played["Тур"], played["Хозяева"], played["Гости"],
+                                                   played["Голы хозяев"], played["Голы гостей"])
+             if league_key(home, away, round_) not in seen_league])
+        conn.executemany(
+            "INSERT INTO matches (competition, stage, date, home_team, away_team, score) "
+            "VALUES ('cup', ?, ?, ?, ?, ?)",
+            [(m["stage"], m["date"], m["home"], m["away"], m["score"]) for m in load_cup_matches(cup_matches_path)
+             if m.get("score") and cup_key(m["home"], m["away"], m["date"]) not in seen_cup])
+
+        sources = (matches_path, match_stats_path, cup_matches_path, cup_match_stats_path)
+        conn.execute("INSERT INTO meta (key, value) VALUES ('sources', ?)", (repr(data_version(*sources)),))
+
+
+class SqliteEventStore:
+    """События из базы SQLite; соединение своё у каждого потока (сессии Streamlit)."""
+
+    def __init__(self, db_path, sources=SOURCE_FILES):
+        self.db_path = db_path
+        self.sources = sources
+        self._local = threading.local()
+        self._import_lock = threading.Lock()
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path)
+        return conn
+
+    def refresh(self):
+        # Переимпорт, если исходные файлы изменились с момента прошлого импорта
+        version = repr(data_version(*self.sources))
+        conn = self.connection()
+        with self._import_lock:
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'sources'").fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            if row is None or row[0] != version:
+                import_files(conn, *self.sources)
+        return self
+
+    def ensure_loaded(self, competition):
+        # Исходные файлы уже проверены при refresh()
+        return self
+
+    def match_events(self, competition, home, away, round_=None, date=None):
+        conn = self.connection()
+        if competition == LEAGUE:
+            row = conn.execute("SELECT id FROM matches WHERE competition = ? AND home_team = ? AND away_team = ? "
+                               "AND round = ? ORDER BY id LIMIT 1", (competition, home, away, int(round_))).fetchone()
+        else:
+            row = conn.execute("SELECT id FROM matches WHERE competition = ? AND home_team = ? AND away_team = ? "
+                               "AND date = ? ORDER BY id LIMIT 1", (competition, home, away, date)).fetchone()
+        if row is None:
+            return None
+
+        match_id = row[0]
+        goals = [{"team": team, "player": player, "minute": minute, "assist": assist}
+                 for team, player, minute, assist in conn.execute(
+                     "SELECT g.team, g.player, g.minute, a.player FROM goals g "
+                     "LEFT JOIN assists a ON a.goal_id = g.id WHERE g.match_id = ? ORDER BY g.id", (match_id,))]
+        cards = defaultdict(list)
+        for color, team, player, minute in conn.execute(
+                "SELECT color, team, player, minute FROM cards WHERE match_id = ? ORDER BY rowid", (match_id,)):
+            cards[color].append({"team": team, "player": player, "minute": minute})
+        return {"goals": goals, "yellow_cards": cards["yellow"], "red_cards": cards["red"]}
+
+    def player_totals(self, competition):
+        query = """
+            SELECT player, team, SUM(goals), SUM(assists), SUM(yellow), SUM(red) FROM (
+                SELECT g.player, g.team, 1 AS goals, 0 AS assists, 0 AS yellow, 0 AS red
+                FROM goals g JOIN matches m ON m.id = g.match_id
+                WHERE m.competition = :c AND g.player IS NOT NULL
+                UNION ALL
+                SELECT a.player, a.team, 0, 1, 0, 0
+                FROM assists a JOIN matches m ON m.id = a.match_id WHERE m.competition = :c
+                UNION ALL
+                SELECT k.player, k.team, 0, 0, k.color = 'yellow', k.color = 'red'
+                FROM cards k JOIN matches m ON m.id = k.match_id WHERE m.competition = :c
+            ) GROUP BY player, team
+        """
+        rows = self.connection().execute(query, {"c": competition}).fetchall()
+        if not rows:
+            return _empty_totals()
+        # Другие написания одного игрока сводятся так же, как в таблице событий (registry.py)
+        registry = event_registry(self.sources[1], self.sources[3])
+        return merge_name_variants(pd.DataFrame(rows, columns=PLAYER_TOTALS_COLUMNS), registry)
+
+
+_sqlite_stores = {}
+_sqlite_lock = threading.Lock()
+
+
+def event_store(sources=SOURCE_FILES):
+    # Хранилище событий, выбранное переменной окружения FOOTBALL_SQLITE_DB.
+    # sources — (matches, match_stats, cup_matches, cup_match_stats) выбранного раздела;
+    # "{partition}" в пути к базе заменяется каталогом раздела, чтобы у каждого сезона была своя база
+    db_path = os.environ.get("FOOTBALL_SQLITE_DB")
+    if not db_path:
+        return JsonEventStore(sources[1], sources[3])
+    partition = os.path.dirname(sources[0]).replace(os.sep, "-") or "root"
+    db_path = db_path.replace("{partition}", partition)
+    with _sqlite_lock:
+        store = _sqlite_stores.setdefault((db_path, sources), SqliteEventStore(db_path, sources))
+    return store.refresh()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Использование: python event_store.py <путь к базе>")
+    with sqlite3.connect(sys.argv[1]) as connection:
+        import_files(connection)
+    print(f"Импорт завершён: {sys.argv[1]}")
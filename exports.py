@@ -0,0 +1,144 @@
+"""Выгрузка таблиц сайта в CSV и XLSX.
+
+Файлы готовятся только по запросу со страницы статистики и кэшируются до
+изменения исходных данных. Архив со всеми данными собирается на диске по одной
+таблице: CSV пишется потоком прямо в элемент zip, поэтому ни архив, ни все
+таблицы сразу в памяти не держатся. XLSX пишется через openpyxl (requirements.txt);
+без него архив содержит только CSV, а в лог пишется предупреждение.
+
+Выгрузка архива из командной строки: python exports.py football.zip [сезон] [чемпионат]
+"""
+import hashlib
+import importlib.util
+import io
+import logging
+import os
+import re
+import sys
+import tempfile
+import zipfile
+
+import pandas as pd
+
+from data_loader import cached_derived, data_version, file_exists
+from event_store import CUP, LEAGUE, event_store
+from player_stats import event_frame, event_registry, with_player_names
+from season_model import squads_model
+from seasons import get_partition
+from standings import league_table
+
+LEADERBOARD_KINDS = ["goals", "yellow_cards", "red_cards"]
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "football_exports")
+
+HAS_XLSX = importlib.util.find_spec("openpyxl") is not None
+
+logger = logging.getLogger(__name__)
+
+
+def leaderboard(totals, kind):
+    # Игроки с ненулевым показателем, по убыванию; при равенстве — по имени, чтобы CSV и XLSX совпадали
+    return totals[totals[kind] > 0].sort_values([kind, "name"], ascending=[False, True],
+                                                kind="stable")[["name", "team", kind]]
+
+
+def leaderboard_file_name(competition, kind):
+    prefix = "cup_" if competition == CUP else ""
+    return f"{prefix}{kind}_stats.csv"
+
+
+def leaderboard_csv(partition, competition, kind):
+    # CSV одной таблицы лидеров; строится при первом запросе и живёт до изменения файлов
+    return cached_derived(f"export_csv:{competition}:{kind}", partition.event_sources, lambda: leaderboard(
+        event_store(partition.event_sources).player_totals(competition), kind)
+        .to_csv(index=False).encode("utf-8-sig"))
+
+
+def _squads_frame(squads):
+    return pd.DataFrame([(player.team, player.name, player.number, player.position)
+                         for team in squads.teams for player in team.players],
+                        columns=["team", "name", "number", "position"]).astype({"number": "Int64"})
+
+
+def bundle_tables(partition):
+    # Таблицы архива по одной: (имя, DataFrame); отсутствующие файлы пропускаются
+    files = partition.files
+    try:
+        yield "standings", league_table(partition)
+    except FileNotFoundError:
+        pass
+    for competition in (LEAGUE, CUP):
+        try:
+            totals = event_store(partition.event_sources).player_totals(competition)
+        except FileNotFoundError:
+            continue
+        for kind in LEADERBOARD_KINDS:
+            yield f"{competition}_{kind}", leaderboard(totals, kind)
+    try:
+        yield "squads", _squads_frame(squads_model(files["squads"]))
+    except FileNotFoundError:
+        pass
+    try:
+        events = with_player_names(event_frame(files["match_stats"], files["cup_match_stats"]),
+                                   event_registry(files["match_stats"], files["cup_match_stats"]))
+    except FileNotFoundError:
+        return
+    # Номера туров — целые (в кубке тура нет, поэтому столбец с пропусками)
+    events = events.astype({"round": "Int64"})
+    for competition in (LEAGUE, CUP):
+        yield f"{competition}_events", events[events["competition"] == competition].drop(columns="competition")
+
+
+def write_bundle(target, partition):
+    # target — путь или файловый объект для записи zip
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as bundle:
+        written = 0
+        for name, table in bundle_tables(partition):
+            written += 1
+            with bundle.open(f"csv/{name}.csv", "w") as raw:
+                text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+                table.to_csv(text, index=False)
+                text.flush()
+                text.detach()
+        if not HAS_XLSX:
+            logger.warning("XLSX не добавлен в архив: не установлен openpyxl (pip install -r requirements.txt)")
+        elif written:
+            with bundle.open("football.xlsx", "w") as raw, pd.ExcelWriter(raw, engine="openpyxl") as writer:
+                for name, table in bundle_tables(partition):
+                    table.to_excel(writer, sheet_name=name[:31], index=False)
+
+
+def _existing_files(partition):
+    # Необязательные файлы (например, кубка) могут отсутствовать: ключ и хэш — по имеющимся
+    return tuple(path for path in partition.files.values() if file_exists(path))
+
+
+def _build_bundle(partition, paths):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    prefix = partition.key.replace("/", "-")
+    digest = hashlib.sha1(repr(data_version(*paths)).encode()).hexdigest()[:12]
+    path = os.path.join(EXPORT_DIR, f"{prefix}-{digest}.zip")
+    if not os.path.exists(path):
+        partial = f"{path}.{os.getpid()}.part"
+        write_bundle(partial, partition)
+        os.replace(partial, path)
+    # Архивы прошлых версий данных этого раздела больше не нужны; шаблон точный, чтобы не задеть
+    # раздел, ключ которого начинается так же (2025/league и 2025/league-b)
+    own = re.compile(rf"{re.escape(prefix)}-[0-9a-f]{{12}}\.zip")
+    for name in os.listdir(EXPORT_DIR):
+        if own.fullmatch(name) and name != os.path.basename(path):
+            os.remove(os.path.join(EXPORT_DIR, name))
+    return path
+
+
+def bundle_path(partition):
+    # Путь к архиву со всеми данными раздела; пересобирается только при изменении файлов
+    paths = _existing_files(partition)
+    return cached_derived("export_bundle", paths, lambda: _build_bundle(partition, paths))
+
+
+if __name__ == "__main__":
+    if not 2 <= len(sys.argv) <= 4:
+        sys.exit("Использование: python exports.py <архив.zip> [сезон] [чемпионат]")
+    selected = get_partition(*sys.argv[2:])
+    write_bundle(sys.argv[1], selected)
+    print(f"Архив {selected.key} записан: {sys.argv[1]}" + ("" if HAS_XLSX else " (без XLSX: нет openpyxl)"))
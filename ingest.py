@@ -0,0 +1,346 @@
+"""Проверка файлов данных при вводе и запись разобранных снимков.
+
+Все файлы раздела (сезон и чемпионат) проверяются один раз: столбцы и поля,
+номера туров и счёт, даты, команды по squads.json, голы в событиях против счёта
+матча, игроки событий по составам (registry.py: опечатки, сокращения, другие
+написания имён). Для каждого файла без ошибок пишется снимок
+.compiled/<файл>.pickle — data_loader загружает его вместо разбора файла; файлы
+с ошибками перечислены в отчёте (failed) и разбираются сайтом как обычно.
+Отчёт в JSON (.compiled/ingest_report.json рядом с matches.csv) перечисляет все
+замечания: файл, место, код, сообщение и уровень (error или warning).
+
+Запуск после правки данных: python ingest.py [--season 2025] [--league main] [--report отчёт.json]
+Код выхода 1, если в каком-либо разделе есть ошибки.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+from collections import Counter
+from datetime import date, datetime
+
+from cup_bracket import parse_score
+from data_loader import COMPILED_DIR, parser_for, write_compiled
+from registry import Registry
+from seasons import partitions
+
+ERROR = "error"
+WARNING = "warning"
+REPORT_FILE = "ingest_report.json"
+
+MATCHES_COLUMNS = ["Тур", "Хозяева", "Гости", "Голы хозяев", "Голы гостей"]
+SCHEDULE_COLUMNS = ["Тур", "Дата", "Хозяева", "Гости"]
+# Без этих файлов раздел не открывается; остальные могут отсутствовать
+REQUIRED_FILES = ("matches", "squads", "match_stats")
+
+_INTEGER = re.compile(r"^\d+$")
+
+
+class Report:
+    """Замечания проверки одного раздела."""
+
+    def __init__(self, partition):
+        self.partition = partition
+        self.issues = []
+
+    def add(self, severity, path, location, code, message):
+        self.issues.append({"file": path, "location": location, "code": code, "message": message,
+                            "severity": severity})
+
+    def error(self, path, location, code, message):
+        self.add(ERROR, path, location, code, message)
+
+    def warning(self, path, location, code, message):
+        self.add(WARNING, path, location, code, message)
+
+    @property
+    def errors(self):
+        return sum(issue["severity"] == ERROR for issue in self.issues)
+
+    @property
+    def warnings(self):
+        return len(self.issues) - self.errors
+
+    def as_dict(self):
+        return {"partition": self.partition.key, "created": datetime.now().isoformat(timespec="seconds"),
+                "errors": self.errors, "warnings": self.warnings, "issues": self.issues}
+
+
+def _read_csv(report, path, columns):
+    # Строки CSV как текст: никаких преобразований, которые могли бы скрыть опечатку
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in columns if column not in (reader.fieldnames or [])]
+        if missing:
+            report.error(path, "заголовок", "missing_column", f"нет столбцов: {', '.join(missing)}")
+            return None
+        # Строка 1 — заголовок
+        return [(line, {column: (row[column] or "").strip() for column in columns})
+                for line, row in enumerate(reader, start=2)]
+
+
+def _read_source(report, partition, name):
+    path = partition.files[name]
+    if not os.path.exists(path):
+        if name in REQUIRED_FILES:
+            report.error(path, "", "missing_file", "файл не найден")
+        else:
+            report.warning(path, "", "missing_file", "файл не найден")
+        return None
+    try:
+        if name == "matches":
+            return _read_csv(report, path, MATCHES_COLUMNS)
+        if name == "schedule":
+            return _read_csv(report, path, SCHEDULE_COLUMNS)
+        return parser_for(path)(path)
+    except (ValueError, csv.Error) as e:
+        report.error(path, "", "unreadable", str(e))
+        return None
+
+
+def _check_team(report, path, location, team, squads):
+    if not team:
+        report.error(path, location, "missing_field", "не указана команда")
+    elif squads and team not in squads:
+        report.error(path, location, "unknown_team", f"команды «{team}» нет в squads.json")
+
+
+def check_squads(report, path, squads):
+    # {команда: [{name, number, position}]}; возвращает {команда: множество игроков}
+    if not isinstance(squads, dict):
+        report.error(path, "", "schema", "ожидается объект {команда: [игроки]}")
+        return {}
+    players = {}
+    for team, roster in squads.items():
+        if not isinstance(roster, list):
+            report.error(path, team, "schema", "состав команды должен быть списком")
+            continue
+        names = players[team] = set()
+        numbers = Counter()
+        for position, player in enumerate(roster):
+            location = f"{team}[{position}]"
+            if not isinstance(player, dict) or not player.get("name"):
+                report.error(path, location, "missing_field", "у игрока нет имени")
+                continue
+            if player["name"] in names:
+                report.warning(path, location, "duplicate_player", f"игрок «{player['name']}» указан дважды")
+            names.add(player["name"])
+            number = player.get("number")
+            if number is not None and (not isinstance(number, int) or number < 0):
+                report.error(path, location, "invalid_number", f"номер «{number}» не является целым числом")
+            numbers[number] += number is not None
+        for number, count in numbers.items():
+            if count > 1:
+                report.warning(path, team, "duplicate_number", f"номер {number} у {count} игроков")
+    return players
+
+
+def check_matches(report, path, rows, squads):
+    # Возвращает {(хозяева, гости, тур): (голы хозяев, голы гостей)} сыгранных матчей
+    played = {}
+    seen = set()
+    for line, row in rows:
+        location = f"строка {line}"
+        if not _INTEGER.match(row["Тур"]) or int(row["Тур"]) < 1:
+            report.error(path, location, "invalid_round", f"номер тура «{row['Тур']}» не является числом")
+            continue
+        for column in ("Хозяева", "Гости"):
+            _check_team(report, path, location, row[column], squads)
+        key = (row["Хозяева"], row["Гости"], int(row["Тур"]))
+        if key in seen:
+            report.error(path, location, "duplicate_match", "матч уже указан в этом туре")
+        seen.add(key)
+
+        home_goals, away_goals = row["Голы хозяев"], row["Голы гостей"]
+        if not home_goals and not away_goals:
+            continue
+        if not _INTEGER.match(home_goals) or not _INTEGER.match(away_goals):
+            report.error(path, location, "invalid_score", f"счёт «{home_goals}:{away_goals}» не из целых чисел")
+            continue
+        played[key] = (int(home_goals), int(away_goals))
+    return played
+
+
+def _check_day_month(report, path, location, value, year):
+    try:
+        day, month = value.split(".")[:2]
+        date(year, int(month), int(day))
+    except ValueError:
+        report.error(path, location, "invalid_date", f"дата «{value}» не в формате ДД.ММ")
+
+
+def check_schedule(report, path, rows, squads, year):
+    for line, row in rows:
+        location = f"строка {line}"
+        if not _INTEGER.match(row["Тур"]):
+            report.error(path, location, "invalid_round", f"номер тура «{row['Тур']}» не является числом")
+        _check_day_month(report, path, location, row["Дата"], year)
+        for column in ("Хозяева", "Гости"):
+            _check_team(report, path, location, row[column], squads)
+
+
+def _check_date(report, path, location, value):
+    try:
+        datetime.strptime(value or "", "%d.%m.%Y")
+    except ValueError:
+        report.error(path, location, "invalid_date", f"дата «{value}» не в формате ДД.ММ.ГГГГ")
+
+
+def check_cup_matches(report, path, fixtures, squads):
+    if not isinstance(fixtures, list):
+        report.error(path, "", "schema", "ожидается список матчей")
+        return
+    for position, fixture in enumerate(fixtures):
+        location = f"[{position}]"
+        missing = [field for field in ("stage", "date", "home", "away") if not fixture.get(field)]
+        if missing:
+            report.error(path, location, "missing_field", f"нет полей: {', '.join(missing)}")
+            continue
+        _check_date(report, path, location, fixture["date"])
+        for field in ("home", "away"):
+            _check_team(report, path, location, fixture[field], squads)
+        if fixture.get("score") and parse_score(fixture["score"]) is None:
+            report.error(path, location, "invalid_score", f"счёт «{fixture['score']}» не распознан")
+
+
+def _check_player(report, path, location, team, player, squads, registry):
+    # Имя сверяется с составом через Registry: опечатки, сокращения и другие написания
+    if player and team in squads:
+        start = len(registry.issues)
+        registry.player_id(team, player, path)
+        for issue in registry.issues[start:]:
+            report.warning(path, location, issue["code"], issue["message"])
+
+
+def check_match_stats(report, path, stats, squads, league_scores=None, registry=None):
+    # Статистика матчей чемпионата (league_scores — счёт из matches.csv) или кубка (None)
+    if registry is None:
+        registry = Registry({team: [{"name": name} for name in names] for team, names in squads.items()})
+    if not isinstance(stats, dict) or not isinstance(stats.get("matches"), list):
+        report.error(path, "", "schema", "ожидается объект {\"matches\": [...]}")
+        return
+    league = league_scores is not None
+    for position, record in enumerate(stats["matches"]):
+        location = f"matches[{position}]"
+        required = ("home_team", "away_team", "round" if league else "date")
+        missing = [field for field in required if record.get(field) in (None, "")]
+        if missing:
+            report.error(path, location, "missing_field", f"нет полей: {', '.join(missing)}")
+            continue
+        home, away = record["home_team"], record["away_team"]
+        for team in (home, away):
+            _check_team(report, path, location, team, squads)
+        if record.get("date"):
+            _check_date(report, path, location, record["date"])
+
+        parsed = parse_score(record.get("score"))
+        if record.get("score") and parsed is None:
+            report.error(path, location, "invalid_score", f"счёт «{record['score']}» не распознан")
+        score = parsed[:2] if parsed else None
+        if league:
+            if not isinstance(record["round"], int):
+                report.error(path, location, "invalid_round", f"номер тура «{record['round']}» не является числом")
+                continue
+            table_score = league_scores.get((home, away, record["round"]))
+            if table_score is None:
+                report.error(path, location, "unknown_match", "матча нет среди сыгранных в matches.csv")
+            elif score is not None and score != table_score:
+                report.error(path, location, "score_mismatch",
+                             f"счёт {score[0]}:{score[1]} не совпадает с matches.csv "
+                             f"({table_score[0]}:{table_score[1]})")
+            score = score or table_score
+
+        goals = Counter()
+        for number, goal in enumerate(record.get("goals", [])):
+            goal_location = f"{location}.goals[{number}]"
+            if goal.get("team") not in (home, away):
+                report.error(path, goal_location, "wrong_team", f"гол команды «{goal.get('team')}», не игравшей матч")
+                continue
+            goals[goal["team"]] += 1
+            _check_player(report, path, goal_location, goal["team"], goal.get("player"), squads, registry)
+            _check_player(report, path, goal_location, goal["team"], goal.get("assist"), squads, registry)
+        if score is not None and (goals[home], goals[away]) != score:
+            report.error(path, location, "goals_mismatch",
+                         f"голов в событиях {goals[home]}:{goals[away]}, а счёт {score[0]}:{score[1]}")
+
+        for kind in ("yellow_cards", "red_cards"):
+            for number, card in enumerate(record.get(kind, [])):
+                card_location = f"{location}.{kind}[{number}]"
+                if card.get("team") not in (home, away):
+                    report.error(path, card_location, "wrong_team",
+                                 f"карточка команды «{card.get('team')}», не игравшей матч")
+                elif not card.get("player"):
+                    report.error(path, card_location, "missing_field", "не указан игрок")
+                else:
+                    _check_player(report, path, card_location, card["team"], card["player"], squads, registry)
+
+
+def validate_partition(partition):
+    report = Report(partition)
+    files = partition.files
+    sources = {name: _read_source(report, partition, name) for name in files}
+
+    squads = check_squads(report, files["squads"], sources["squads"]) if sources["squads"] is not None else {}
+    league_scores = {}
+    if sources["matches"] is not None:
+        league_scores = check_matches(report, files["matches"], sources["matches"], squads)
+    if sources["schedule"] is not None:
+        check_schedule(report, files["schedule"], sources["schedule"], squads, partition.year)
+    if sources["cup_matches"] is not None:
+        check_cup_matches(report, files["cup_matches"], sources["cup_matches"], squads)
+    # Один реестр на раздел: имя, записанное иначе в чемпионате и кубке, сверяется с одним составом
+    registry = Registry({team: [{"name": name} for name in names] for team, names in squads.items()})
+    if sources["match_stats"] is not None:
+        check_match_stats(report, files["match_stats"], sources["match_stats"], squads, league_scores, registry)
+    if sources["cup_match_stats"] is not None:
+        check_match_stats(report, files["cup_match_stats"], sources["cup_match_stats"], squads, registry=registry)
+    return report
+
+
+def report_path(partition):
+    return os.path.join(os.path.dirname(partition.files["matches"]), COMPILED_DIR, REPORT_FILE)
+
+
+def ingest_partition(partition, report_file=None):
+    # Проверка раздела; снимок пишется для каждого файла без ошибок. Отчёт пишется всегда
+    report = validate_partition(partition)
+    result = report.as_dict()
+    failed = {issue["file"] for issue in report.issues if issue["severity"] == ERROR}
+    result["compiled"] = []
+    result["failed"] = [path for path in dict.fromkeys(partition.files.values()) if path in failed]
+    for path in dict.fromkeys(partition.files.values()):
+        if path not in failed and os.path.exists(path):
+            result["compiled"].append(write_compiled(path, parser_for(path)(path)))
+
+    report_file = report_file or report_path(partition)
+    os.makedirs(os.path.dirname(report_file) or ".", exist_ok=True)
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка файлов данных и запись разобранных снимков")
+    parser.add_argument("--season")
+    parser.add_argument("--league")
+    parser.add_argument("--report", help="файл отчёта (если раздел один); по умолчанию .compiled/" + REPORT_FILE)
+    args = parser.parse_args()
+
+    chosen = [p for p in partitions() if (args.season is None or p.season == args.season) and
+              (args.league is None or p.league == args.league)]
+    if not chosen:
+        parser.error("нет такого сезона или чемпионата")
+    if args.report and len(chosen) > 1:
+        parser.error("--report можно указать только для одного раздела")
+    failed = False
+    for partition in chosen:
+        result = ingest_partition(partition, args.report)
+        failed |= bool(result["errors"])
+        print(f"{partition.key}: ошибок {result['errors']}, предупреждений {result['warnings']}, "
+              f"снимков {len(result['compiled'])}" +
+              (f", без снимка (ошибки): {', '.join(result['failed'])}" if result["failed"] else ""))
+        for issue in result["issues"]:
+            if issue["severity"] == ERROR:
+                print(f"  {issue['file']} {issue['location']}: {issue['message']}")
+    raise SystemExit(1 if failed else 0)
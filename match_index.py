@@ -0,0 +1,72 @@
+"""Индексы событий матчей по составному ключу.
+
+Чемпионат индексируется по (хозяева, гости, тур), кубок — по (хозяева, гости, дата).
+Индекс строится один раз на версию файла статистики, поиск — один запрос к dict.
+"""
+import logging
+
+from data_loader import (CUP_MATCH_STATS_FILE, MATCH_STATS_FILE, cached_derived, load_cup_match_stats,
+                         load_match_stats)
+
+logger = logging.getLogger(__name__)
+
+
+def league_key(home, away, round_):
+    return home, away, int(round_)
+
+
+def cup_key(home, away, date):
+    return home, away, date
+
+
+class MatchIndex:
+    def __init__(self, records, make_key, fields, source):
+        self.source = source
+        self.by_key = {}
+        self.duplicates = []
+        self.incomplete = []
+
+        for position, record in enumerate(records):
+            values = [record.get(field) for field in fields]
+            if any(value is None or value == "" for value in values):
+                self.incomplete.append(position)
+                continue
+            key = make_key(*values)
+            if key in self.by_key:
+                # Оставляем первую запись, как делал прежний линейный поиск
+                self.duplicates.append(key)
+                continue
+            self.by_key[key] = record
+
+    def get(self, key):
+        return self.by_key.get(key)
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def missing(self, keys):
+        # Ключи сыгранных матчей, для которых в файле статистики нет записи
+        return [key for key in keys if key not in self.by_key]
+
+    def problems(self):
+        messages = [f"{self.source}: запись №{position + 1} без ключевых полей" for position in self.incomplete]
+        messages += [f"{self.source}: повторная запись матча {' / '.join(map(str, key))}"
+                     for key in self.duplicates]
+        return messages
+
+
+def _build(records, make_key, fields, source):
+    index = MatchIndex(records, make_key, fields, source)
+    for message in index.problems():
+        logger.warning(message)
+    return index
+
+
+def league_index(path=MATCH_STATS_FILE):
+    return cached_derived("league_index", (path,), lambda: _build(
+        load_match_stats(path)["matches"], league_key, ("home_team", "away_team", "round"), path))
+
+
+def cup_index(path=CUP_MATCH_STATS_FILE):
+    return cached_derived("cup_index", (path,), lambda: _build(
+        load_cup_match_stats(path)["matches"], cup_key, ("home_team", "away_team", "date"), path))
@@ -0,0 +1,67 @@
+"""Журнал матчей игрока: голы, передачи и карточки в чемпионате и кубке.
+
+Обратный индекс строится один раз на версию файлов статистики по таблице событий
+player_stats.py: события упорядочиваются по номеру игрока (registry.py), затем по дате,
+и для каждого номера хранятся границы его отрезка. Журнал игрока — срез этого отрезка,
+поэтому открытие профиля не просматривает матчи сезона.
+"""
+import numpy as np
+import pandas as pd
+
+from data_loader import CUP_MATCH_STATS_FILE, MATCH_STATS_FILE, cached_derived
+from player_stats import CUP, KINDS, LEAGUE, NO_PLAYER, event_frame, event_registry
+
+LOG_COLUMNS = ["competition", "stage", "date", "venue", "opponent", "kind", "minute"]
+
+COMPETITION_LABELS = {LEAGUE: "Чемпионат", CUP: "Кубок"}
+KIND_LABELS = {"goals": "Гол", "assists": "Передача", "yellow_cards": "Жёлтая карточка",
+               "red_cards": "Красная карточка"}
+
+
+class PlayerLog:
+    """События всех игроков, упорядоченные по номеру игрока, и границы отрезков."""
+
+    def __init__(self, events, registry):
+        self.registry = registry
+        events = events[events["player_id"] != NO_PLAYER]
+        player_ids = events["player_id"].to_numpy()
+        dates = pd.to_datetime(events["date"], format="%d.%m.%Y", errors="coerce")
+        # Матчи без даты — в начале отрезка игрока; при равных датах порядок файлов сохраняется
+        order = np.lexsort((dates.to_numpy().astype(np.int64), player_ids))
+        events = events.iloc[order]
+
+        home = events["team"].cat.codes.to_numpy() == events["home_team"].cat.codes.to_numpy()
+        rounds = pd.to_numeric(events["round"], errors="coerce").astype("Int64").astype(str).radd("Тур ")
+        self.rows = pd.DataFrame({
+            "competition": events["competition"].astype(str).map(COMPETITION_LABELS).to_numpy(),
+            "stage": np.where(events["round"].notna(), rounds, events["stage"].fillna("")),
+            "date": events["date"].fillna("").to_numpy(),
+            "venue": np.where(home, "дома", "в гостях"),
+            "opponent": np.where(home, events["away_team"].astype(str), events["home_team"].astype(str)),
+            "kind": events["kind"].astype(str).map(KIND_LABELS).to_numpy(),
+            # Минута может быть записана с добавленным временем («90+2»)
+            "minute": events["minute"].astype(object).where(events["minute"].notna(), "").astype(str).to_numpy(),
+        }, columns=LOG_COLUMNS)
+        self.kinds = events["kind"].astype(str).to_numpy()
+        self.bounds = np.searchsorted(player_ids[order], np.arange(len(registry.player_names) + 1))
+
+    def _slice(self, team, name):
+        player_id = self.registry.find(team, name)
+        if player_id is None:
+            return slice(0, 0)
+        return slice(self.bounds[player_id], self.bounds[player_id + 1])
+
+    def matches(self, team, name):
+        # События игрока по датам; пустая таблица, если игрок не отмечался в матчах
+        return self.rows.iloc[self._slice(team, name)].reset_index(drop=True)
+
+    def totals(self, team, name):
+        # Голы, передачи и карточки игрока в обоих турнирах
+        kinds = self.kinds[self._slice(team, name)]
+        return {kind: int((kinds == kind).sum()) for kind in KINDS}
+
+
+def player_log(match_stats_path=MATCH_STATS_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    # Общий для всех сессий индекс; пересчитывается после изменения файлов статистики
+    return cached_derived("player_log", (match_stats_path, cup_match_stats_path), lambda: PlayerLog(
+        event_frame(match_stats_path, cup_match_stats_path), event_registry(match_stats_path, cup_match_stats_path)))
@@ -0,0 +1,139 @@
+"""Поиск игрока по всем командам.
+
+В индекс попадают все игроки из squads.json и все имена из событий матчей
+(в том числе сокращённые вроде «Романов Ю.»). Имена приводятся к общему ключу:
+регистр, ё/е, транслитерация кириллицы в латиницу и склейка неоднозначных
+сочетаний (kh/h, yu/iu, y/i...), поэтому «Ильин», «ильин» и «Ilyin» находят одно и то же.
+Сначала ищется совпадение по началу слов, затем — по общим триграммам.
+Индекс строится один раз на версию файлов.
+"""
+import bisect
+import heapq
+import re
+from collections import defaultdict
+
+from data_loader import CUP_MATCH_STATS_FILE, MATCH_STATS_FILE, SQUADS_FILE, cached_derived
+from player_stats import KINDS, canonical_name, event_registry, player_totals
+from season_model import squads_model
+
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z", "и": "i",
+    "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t",
+    "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "",
+    "э": "e", "ю": "yu", "я": "ya",
+})
+
+# Разные латинские написания одного звука сводятся к одному; порядок важен
+_FOLDS = [("shch", "sh"), ("sch", "sh"), ("kh", "h"), ("tz", "c"), ("ts", "c"), ("yu", "iu"), ("ju", "iu"),
+          ("ya", "ia"), ("ja", "ia"), ("yo", "e"), ("ye", "e"), ("y", "i"), ("j", "i"), ("w", "v"), ("x", "ks"),
+          ("q", "k"), ("ii", "i")]
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+MIN_TRIGRAM_SCORE = 0.4
+
+
+def normalize(text):
+    # Ключ поиска: латиница без неоднозначных сочетаний
+    text = text.casefold().replace("ё", "е").translate(_TRANSLIT)
+    for source, target in _FOLDS:
+        text = text.replace(source, target)
+    return text
+
+
+def tokens(text):
+    return [normalize(word) for word in _WORD.findall(text or "")]
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerIndex:
+    """Индекс игроков: префиксы слов и триграммы → номера записей."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        token_postings = defaultdict(set)
+        self.trigram_postings = defaultdict(set)
+        for position, entry in enumerate(entries):
+            for token in tokens(entry["name"]):
+                token_postings[token].add(position)
+                for trigram in trigrams(token):
+                    self.trigram_postings[trigram].add(position)
+        self.sorted_tokens = sorted(token_postings)
+        self.token_postings = dict(token_postings)
+        # Порядок при равной оценке: больше голов, затем по алфавиту
+        ranked = sorted(range(len(entries)), key=lambda position: (-entries[position]["goals"],
+                                                                   entries[position]["name"]))
+        self.rank = [0] * len(entries)
+        for rank, position in enumerate(ranked):
+            self.rank[position] = rank
+
+    def _prefix_matches(self, prefix):
+        matched = set()
+        start = bisect.bisect_left(self.sorted_tokens, prefix)
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matched |= self.token_postings[token]
+        return matched
+
+    def search(self, query, limit=20):
+        query_tokens = tokens(query)
+        if not query_tokens:
+            return []
+
+        # Каждое слово запроса должно быть началом какого-то слова имени; полное совпадение слова выше
+        candidates = None
+        for token in query_tokens:
+            matched = self._prefix_matches(token)
+            candidates = matched if candidates is None else candidates & matched
+        scores = dict.fromkeys(candidates, 2.0)
+        for token in query_tokens:
+            for position in self.token_postings.get(token, ()):
+                if position in scores:
+                    scores[position] += 1
+
+        if not scores:
+            # Опечатки и другие написания: доля общих триграмм
+            query_trigrams = set().union(*(trigrams(token) for token in query_tokens))
+            shared = defaultdict(int)
+            for trigram in query_trigrams:
+                for position in self.trigram_postings.get(trigram, ()):
+                    shared[position] += 1
+            scores = {position: count / len(query_trigrams) for position, count in shared.items()
+                      if count / len(query_trigrams) >= MIN_TRIGRAM_SCORE}
+
+        best = heapq.nsmallest(limit, scores, key=lambda position: (-scores[position], self.rank[position]))
+        return [self.entries[position] for position in best]
+
+
+def build_player_index(squads, totals, registry=None):
+    # Записи (игрок, команда) из составов и событий с суммой показателей по обоим турнирам;
+    # registry сопоставляет написание в составе с написанием в событиях
+    summed = totals.groupby(["name", "team"], sort=False)[KINDS].sum()
+    stats = {key: dict(zip(KINDS, map(int, values))) for key, values in zip(summed.index, summed.to_numpy())}
+
+    entries = []
+    seen = set()
+    for team in squads.teams:
+        for player in team.players:
+            name = player.name if registry is None else canonical_name(registry, player.team, player.name)
+            key = (name, player.team)
+            seen.add(key)
+            entries.append({"name": player.name, "team": player.team, "number": player.number,
+                            "position": player.position, **stats.get(key, dict.fromkeys(KINDS, 0))})
+    for (name, team), values in stats.items():
+        if (name, team) not in seen:
+            entries.append({"name": name, "team": team, "number": None, "position": None, **values})
+    return PlayerIndex(entries)
+
+
+def player_index(squads_path=SQUADS_FILE, match_stats_path=MATCH_STATS_FILE,
+                 cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    return cached_derived("player_index", (squads_path, match_stats_path, cup_match_stats_path),
+                          lambda: build_player_index(squads_model(squads_path),
+                                                     player_totals(match_stats_path, cup_match_stats_path),
+                                                     event_registry(match_stats_path, cup_match_stats_path)))
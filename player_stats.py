@@ -0,0 +1,143 @@
+"""Статистика игроков, посчитанная по событиям матчей чемпионата и кубка.
+
+Голы, передачи, жёлтые и красные карточки обоих турниров раскладываются в одну
+таблицу событий, итоги считаются одним groupby по (игрок, турнир). Игроки и команды
+в таблице событий — номера из registry.py (игрок — int32, команды — категории, код
+которых равен номеру команды); имена подставляются только в итоговую таблицу.
+Таблицы и номера кэшируются до изменения файлов статистики матчей.
+"""
+import numpy as np
+import pandas as pd
+
+from data_loader import (CUP_MATCH_STATS_FILE, MATCH_STATS_FILE, cached_derived, load_cup_match_stats,
+                         load_match_stats)
+from registry import Registry
+
+LEAGUE = "league"
+CUP = "cup"
+
+EVENT_COLUMNS = ["competition", "kind", "player_id", "team", "minute", "round", "stage", "date", "home_team",
+                 "away_team"]
+KINDS = ["goals", "assists", "yellow_cards", "red_cards"]
+TOTALS_COLUMNS = ["name", "team", "competition"] + KINDS
+
+# Номер игрока для гола без автора (player = null)
+NO_PLAYER = -1
+
+
+def _flatten(competition, records, registry, source):
+    # Одно событие — одна строка; передача записывается отдельным событием от ассистента
+    for position, record in enumerate(records):
+        location = f"{source}: matches[{position}]"
+        match = (record.get("round"), record.get("stage"), record.get("date"),
+                 record["home_team"], record["away_team"])
+        # Команды матча заводятся первыми: их написание становится основным
+        registry.team_id(record["home_team"], location)
+        registry.team_id(record["away_team"], location)
+        for goal in record.get("goals", []):
+            player = registry.player_id(goal["team"], goal["player"], location) if goal.get("player") else NO_PLAYER
+            yield (competition, "goals", player, goal["team"], goal.get("minute"), *match)
+            if goal.get("assist"):
+                yield (competition, "assists", registry.player_id(goal["team"], goal["assist"], location),
+                       goal["team"], goal.get("minute"), *match)
+        for kind in ("yellow_cards", "red_cards"):
+            for card in record.get(kind, []):
+                yield (competition, kind, registry.player_id(card["team"], card["player"], location), card["team"],
+                       card.get("minute"), *match)
+
+
+def build_event_frame(match_stats, cup_match_stats, registry=None):
+    # Номера игроков и команд заводятся в registry (по умолчанию — новый Registry)
+    registry = Registry() if registry is None else registry
+    rows = [*_flatten(LEAGUE, match_stats["matches"], registry, "match_stats"),
+            *_flatten(CUP, cup_match_stats["matches"], registry, "cup_match_stats")]
+    events = pd.DataFrame(rows, columns=EVENT_COLUMNS)
+    events["player_id"] = events["player_id"].astype(np.int32)
+    # Названия команд сводятся к номерам реестра: другое написание команды — тот же код категории
+    codes = {column: events[column].map({name: registry.team_id(name) for name in pd.unique(events[column])})
+             for column in ("team", "home_team", "away_team")}
+    for column, column_codes in codes.items():
+        events[column] = pd.Categorical.from_codes(column_codes.to_numpy(dtype=np.int64), dtype=registry.team_dtype())
+    for column in ("competition", "kind"):
+        events[column] = events[column].astype("category")
+    return events
+
+
+def build_player_totals(events, registry):
+    # Голы с неизвестным автором в итоги игроков не попадают; команда игрока задана его номером
+    known = events[events["player_id"] != NO_PLAYER]
+    totals = (known.groupby(["player_id", "competition", "kind"], observed=True).size()
+              .unstack("kind", fill_value=0)
+              .reindex(columns=KINDS, fill_value=0)
+              .reset_index())
+    totals.columns.name = None
+    totals["name"], totals["team"] = registry.names(totals["player_id"])
+    totals["competition"] = totals["competition"].astype(str)
+    return totals.sort_values(["name", "team", "competition"], ignore_index=True)[TOTALS_COLUMNS]
+
+
+def with_player_names(events, registry):
+    # Таблица событий для вывода: имя игрока вместо номера
+    names = np.asarray([*registry.player_names, None], dtype=object)[events["player_id"].to_numpy()]
+    return events.drop(columns="player_id").assign(player=names)[
+        [("player" if column == "player_id" else column) for column in EVENT_COLUMNS]]
+
+
+def _events(match_stats_path, cup_match_stats_path):
+    def build():
+        registry = Registry()
+        events = build_event_frame(load_match_stats(match_stats_path), load_cup_match_stats(cup_match_stats_path),
+                                   registry)
+        return registry, events
+
+    return cached_derived("event_frame", (match_stats_path, cup_match_stats_path), build)
+
+
+def event_registry(match_stats_path=MATCH_STATS_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    # Номера игроков и команд событий раздела и замечания к именам
+    return _events(match_stats_path, cup_match_stats_path)[0]
+
+
+def event_frame(match_stats_path=MATCH_STATS_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    return _events(match_stats_path, cup_match_stats_path)[1]
+
+
+def player_totals(match_stats_path=MATCH_STATS_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    # Итоги по (игрок, команда, турнир); общие для всех сессий — не изменять на месте
+    return cached_derived("player_totals", (match_stats_path, cup_match_stats_path), lambda: build_player_totals(
+        event_frame(match_stats_path, cup_match_stats_path), event_registry(match_stats_path, cup_match_stats_path)))
+
+
+def competition_totals(competition, match_stats_path=MATCH_STATS_FILE, cup_match_stats_path=CUP_MATCH_STATS_FILE):
+    totals = player_totals(match_stats_path, cup_match_stats_path)
+    return totals[totals["competition"] == competition].drop(columns="competition").reset_index(drop=True)
+
+
+def canonical_name(registry, team, name):
+    # Имя игрока так, как оно записано в итогах (первое написание в событиях); неизвестный — как есть
+    player_id = registry.find(team, name)
+    return name if player_id is None else registry.player_names[player_id]
+
+
+def merge_name_variants(totals, registry):
+    # Итоги, сгруппированные по строкам имён (SQLite), с другими написаниями одного игрока в одной строке
+    keys = []
+    for name, team in zip(totals["name"], totals["team"]):
+        player_id = registry.find(team, name)
+        keys.append((name, team) if player_id is None else
+                    (registry.player_names[player_id], registry.teams[registry.player_teams[player_id]]))
+    names, teams = zip(*keys)
+    merged = totals.assign(name=names, team=teams).groupby(["name", "team"], as_index=False)[KINDS].sum()
+    return merged[["name", "team"] + KINDS]
+
+
+def squad_table(players, team, league_totals, registry=None):
+    # Состав команды (записи Player из season_model) с показателями чемпионата по событиям матчей;
+    # registry (event_registry) сопоставляет написание в составе с написанием в событиях
+    roster = pd.DataFrame([(player.name, player.number, player.position) for player in players],
+                          columns=["name", "number", "position"])
+    team_totals = league_totals[league_totals["team"] == team][["name"] + KINDS]
+    keys = roster["name"] if registry is None else roster["name"].map(lambda name: canonical_name(registry, team, name))
+    table = roster.assign(key=keys).merge(team_totals.rename(columns={"name": "key"}), on="key", how="left")
+    table[KINDS] = table[KINDS].fillna(0).astype(int)
+    return table.drop(columns="key")
@@ -0,0 +1,235 @@
+"""Порядок команд в таблице при равенстве очков по регламентным критериям.
+
+Критерии применяются по порядку из списка tiebreakers (по умолчанию TIEBREAKERS):
+
+    h2h_points     очки в матчах между собой
+    h2h_goal_diff  разница мячей в матчах между собой
+    h2h_goals_for  забитые мячи в матчах между собой
+    goal_diff      разница мячей во всех матчах
+    goals_for      забитые мячи во всех матчах
+    wins           число побед
+    fair_play      меньше штрафных очков за карточки (жёлтая — 1, красная — 3)
+
+Как только критерий разделил группу, для каждой оставшейся группы равных команд
+критерии применяются заново с первого (личные встречи считаются уже внутри меньшей
+группы). Если все критерии равны, команды идут по алфавиту.
+
+Личные встречи берутся из матриц команда×команда (очки и голы), поэтому мини-турнир
+любой группы команд — это выборка np.ix_, без фильтрации таблицы матчей.
+rank_many упорядочивает сразу много таблиц (смоделированные сезоны, таблицы после
+каждого тура) массивами NumPy: группы равных команд всех таблиц делятся одновременно.
+Список критериев раздела можно задать в манифесте: "tiebreakers": [...] у чемпионата.
+"""
+import numpy as np
+import pandas as pd
+
+from data_loader import cached_derived, load_match_stats
+
+TIEBREAKERS = ("h2h_points", "h2h_goal_diff", "h2h_goals_for", "goal_diff", "goals_for", "wins", "fair_play")
+CRITERIA = set(TIEBREAKERS)
+FAIR_PLAY_POINTS = {"yellow_cards": 1, "red_cards": 3}
+
+# Матрицы личных встреч: [POINTS, i, j] — очки i в матчах с j, [GOALS, i, j] — голы i в ворота j
+POINTS, GOALS = range(2)
+
+# Ключ порядка: номер группы × SCALE − значение критерия; значения критериев по модулю меньше SCALE / 2
+SCALE = 1 << 24
+
+
+def head_to_head(home, away, home_goals, away_goals, n_teams, groups=None, n_groups=1):
+    # Матрицы личных встреч по группам матчей (турам), форма (n_groups, 2, n, n)
+    if groups is None:
+        groups = np.zeros(len(home), dtype=np.int64)
+    base = groups * 2 * n_teams * n_teams
+    size = n_groups * 2 * n_teams * n_teams
+    home_points = 3 * (home_goals > away_goals) + (home_goals == away_goals)
+    away_points = 3 * (away_goals > home_goals) + (home_goals == away_goals)
+    cells = np.concatenate([home * n_teams + away, away * n_teams + home])
+    matrices = (np.bincount(np.concatenate([base, base]) + cells,
+                            weights=np.concatenate([home_points, away_points]), minlength=size) +
+                np.bincount(np.concatenate([base, base]) + n_teams * n_teams + cells,
+                            weights=np.concatenate([home_goals, away_goals]), minlength=size))
+    return matrices.astype(np.int32).reshape(n_groups, 2, n_teams, n_teams)
+
+
+def check_tiebreakers(tiebreakers):
+    unknown = [name for name in tiebreakers if name not in CRITERIA]
+    if unknown:
+        raise ValueError(f"неизвестные критерии: {', '.join(unknown)}; допустимы: {', '.join(TIEBREAKERS)}")
+    return tuple(tiebreakers)
+
+
+class _Criteria:
+    """Значения критериев для группы команд (больше — выше в таблице)."""
+
+    def __init__(self, counts, h2h, fair_play):
+        wins, draws, losses, goals_for, goals_against = counts.T
+        self.totals = {"goal_diff": goals_for - goals_against, "goals_for": goals_for, "wins": wins}
+        self.h2h = h2h
+        self._fair_play = fair_play
+        self._fair_play_values = None
+
+    def values(self, name, group):
+        if name in self.totals:
+            return self.totals[name][group]
+        if name == "fair_play":
+            # Карточки нужны редко — только если совпало всё остальное
+            if self._fair_play_values is None:
+                penalties = self._fair_play() if self._fair_play else None
+                self._fair_play_values = -np.asarray(penalties if penalties is not None else
+                                                     np.zeros(len(self.totals["wins"])))
+            return self._fair_play_values[group]
+        points, goals = self.h2h[POINTS][np.ix_(group, group)], self.h2h[GOALS][np.ix_(group, group)]
+        if name == "h2h_points":
+            return points.sum(axis=1)
+        if name == "h2h_goal_diff":
+            return goals.sum(axis=1) - goals.sum(axis=0)
+        return goals.sum(axis=1)
+
+
+def _resolve(group, criteria, tiebreakers, names):
+    # Порядок группы команд с равными очками
+    if len(group) == 1:
+        return list(group)
+    for name in tiebreakers:
+        values = criteria.values(name, group)
+        if values.min() == values.max():
+            continue
+        order = []
+        for value in np.unique(values)[::-1]:
+            order += _resolve(group[values == value], criteria, tiebreakers, names)
+        return order
+    return sorted(group, key=lambda team: names[team])
+
+
+def rank(names, counts, h2h, tiebreakers=TIEBREAKERS, fair_play=None):
+    # Индексы команд в порядке таблицы; counts — (n, 5): W, D, L, GF, GA; h2h — (2, n, n);
+    # fair_play — функция без аргументов, возвращающая штрафные очки команд (вызывается при необходимости)
+    names = [str(name) for name in names]
+    points = 3 * counts[:, 0] + counts[:, 1]
+    criteria = _Criteria(counts, h2h, fair_play)
+    order = []
+    for value in np.unique(points)[::-1]:
+        order += _resolve(np.flatnonzero(points == value), criteria, tiebreakers, names)
+    return np.array(order, dtype=np.int64)
+
+
+def _build_fair_play(records):
+    # Штрафные очки по турам нарастающим итогом: строки — туры, столбцы — команды
+    rows = [(record["round"], card["team"], points) for record in records
+            for kind, points in FAIR_PLAY_POINTS.items() for card in record.get(kind, [])]
+    if not rows:
+        return pd.DataFrame()
+    frame = pd.DataFrame(rows, columns=["round", "team", "points"])
+    return frame.pivot_table(index="round", columns="team", values="points", aggfunc="sum",
+                             fill_value=0).sort_index().cumsum()
+
+
+def _fair_play_table(match_stats_path):
+    return cached_derived("fair_play", (match_stats_path,),
+                          lambda: _build_fair_play(load_match_stats(match_stats_path)["matches"]))
+
+
+def fair_play_points(match_stats_path, teams, round_=None):
+    # Штрафные очки команд (в порядке teams) после тура round_ (None — после последнего)
+    table = _fair_play_table(match_stats_path)
+    if round_ is not None:
+        table = table.loc[:round_]
+    if table.empty:
+        return np.zeros(len(teams), dtype=np.int64)
+    return table.iloc[-1].reindex(teams, fill_value=0).to_numpy(dtype=np.int64)
+
+
+def fair_play_history(match_stats_path, teams, rounds):
+    # Штрафные очки команд после каждого из туров rounds, форма (туры, команды)
+    table = _fair_play_table(match_stats_path)
+    if table.empty:
+        return np.zeros((len(rounds), len(teams)), dtype=np.int64)
+    table = table.reindex(table.index.union(rounds)).ffill().loc[rounds]
+    return table.reindex(columns=teams).fillna(0).to_numpy(dtype=np.int64)
+
+
+def _ahead(keys):
+    # Для каждой команды — число команд с меньшим ключом (выше в таблице); равные ключи дают равные номера
+    return (keys[:, None, :] < keys[:, :, None]).sum(axis=2)
+
+
+def _has_ties(labels):
+    ordered = np.sort(labels, axis=1)
+    return (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+
+
+def incidence(teams, n_teams):
+    # Матрица матч × команда: произведение (таблицы × матчи) @ матрица — суммы по командам
+    matrix = np.zeros((len(teams), n_teams), dtype=np.float32)
+    matrix[np.arange(len(teams)), teams] = 1
+    return matrix
+
+
+def team_sums(features, blocks):
+    # features — массивы (таблицы × матчи), blocks[i][k] — матрица матч × команда для столбца i
+    # в k-й результат; возвращает суммы по командам (целые)
+    totals = np.concatenate(features, axis=1).astype(np.float32) @ np.block(blocks)
+    return np.split(np.rint(totals).astype(np.int64), len(blocks[0]), axis=1)
+
+
+def _mini_league(labels, same, h2h, home, away, home_goals, away_goals, played):
+    # Очки, забитые и пропущенные мячи в матчах внутри своей группы равных команд
+    n_teams = labels.shape[1]
+    inside = labels[:, home] == labels[:, away]
+    if played is not None:
+        inside &= played
+    home_points = 3 * (home_goals > away_goals) + (home_goals == away_goals)
+    away_points = 3 * (away_goals > home_goals) + (home_goals == away_goals)
+    hosts, guests = incidence(home, n_teams), incidence(away, n_teams)
+    none = np.zeros_like(hosts)
+    points, goals_for, goals_against = team_sums(
+        [home_points * inside, away_points * inside, home_goals * inside, away_goals * inside],
+        [[hosts, none, none], [guests, none, none], [none, hosts, guests], [none, guests, hosts]])
+    same = same.astype(np.float32)
+    points += np.rint(np.einsum("sij,ij->si", same, h2h[POINTS])).astype(np.int64)
+    goals_for += np.rint(np.einsum("sij,ij->si", same, h2h[GOALS])).astype(np.int64)
+    goals_against += np.rint(np.einsum("sij,ji->si", same, h2h[GOALS])).astype(np.int64)
+    return {"h2h_points": points, "h2h_goal_diff": goals_for - goals_against, "h2h_goals_for": goals_for}
+
+
+def rank_many(totals, h2h, home, away, home_goals, away_goals, tiebreakers=TIEBREAKERS, penalties=None,
+              alphabet=None, played=None):
+    # Места (с нуля) команд сразу во многих таблицах по тем же правилам, что rank. totals — points,
+    # goal_diff, goals_for, wins (таблицы × команды); h2h — общие для всех таблиц личные встречи (2, n, n);
+    # home, away — матчи сверх h2h, их голы и played (сыгран ли матч) — массивы таблицы × матчи;
+    # penalties — штрафные очки (n) или (таблицы × n); alphabet — место команды в алфавитном порядке
+    n_teams = totals["points"].shape[1]
+    fair_play = np.zeros(n_teams, dtype=np.int64) if penalties is None else -np.asarray(penalties)
+
+    labels = _ahead(-totals["points"])
+    rows = np.flatnonzero(_has_ties(labels))
+    while len(rows):
+        group = labels[rows]
+        same = group[:, :, None] == group[:, None, :]
+        tied = same.sum(axis=2) > 1
+        chosen = np.zeros(group.shape, dtype=np.int64)
+        split = np.zeros(group.shape, dtype=bool)
+        mini_league = None
+        for name in tiebreakers:
+            if name == "fair_play":
+                values = fair_play[rows] if fair_play.ndim == 2 else np.broadcast_to(fair_play, group.shape)
+            elif name in totals:
+                values = totals[name][rows]
+            else:
+                if mini_league is None:
+                    mini_league = _mini_league(group, same, h2h, home, away, home_goals[rows], away_goals[rows],
+                                               None if played is None else played[rows])
+                values = mini_league[name]
+            # Группу делит первый критерий, по которому её команды различаются
+            spread = (same & (values[:, None, :] != values[:, :, None])).any(axis=2) & ~split
+            chosen[spread] = values[spread]
+            split |= spread
+            if (split | ~tied).all():
+                break
+        labels[rows] = _ahead(group * SCALE - chosen)
+        # После деления критерии применяются заново внутри новых групп
+        rows = rows[split.any(axis=1) & _has_ties(labels[rows])]
+
+    alphabet = np.arange(n_teams) if alphabet is None else alphabet
+    return _ahead(labels * n_teams + alphabet)
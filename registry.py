@@ -0,0 +1,174 @@
+"""Номера команд и игроков: таблицы хранят целые числа, имена подставляются при выводе.
+
+Registry присваивает номер каждой команде и каждому игроку (игрок — команда и имя)
+при загрузке, в порядке появления: сначала составы (если переданы), затем события
+матчей. Номера устойчивы, пока не меняется порядок записей в файлах. Таблица событий
+(player_stats.py) хранит номер игрока (int32) и категориальные столбцы команд,
+итоги считаются groupby по номерам, а имена берутся из Registry в самом конце.
+
+При интернировании имя игрока сверяется с уже известными именами его команды,
+название команды — с известными командами:
+
+    variant_spelling  отличается только регистром, ё/е или пробелами — это тот же игрок
+    abbreviated_name  сокращение («Романов Ю.»), подходит ровно один игрок
+    ambiguous_name    сокращение, под которое подходят несколько игроков
+    misspelled_name   похоже на известное имя (вероятная опечатка)
+    unknown_player    игрока нет в составе команды (если составы переданы)
+    misspelled_team   название команды похоже на известное
+    unknown_team      команды нет в составах (если составы переданы)
+
+Для сокращений и опечаток игрок получает отдельный номер: статистика не
+объединяется молча, а замечание пишется в лог и в отчёт ingest.py.
+"""
+import difflib
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+# Похожесть имён (difflib), начиная с которой имя считается вероятной опечаткой
+MISSPELLING_CUTOFF = 0.85
+
+_INITIAL = re.compile(r"^[^\W\d_]\.$")
+
+logger = logging.getLogger(__name__)
+
+
+def name_key(name):
+    # Написание без учёта регистра, ё/е и лишних пробелов
+    return " ".join(str(name).casefold().replace("ё", "е").split())
+
+
+class Registry:
+    """Номера команд и игроков одного раздела с замечаниями к именам."""
+
+    def __init__(self, squads=None):
+        self.teams = []
+        self.player_names = []
+        self.player_teams = []
+        self.issues = []
+        self._team_ids = {}
+        self._team_keys = {}
+        self._player_ids = {}
+        self._player_keys = {}
+        # Команды составов — эталон: заносятся напрямую, без сверки друг с другом
+        # («ФК Команда 1» и «ФК Команда 11» — не опечатка)
+        for team, players in (squads or {}).items():
+            team_id = self._team_ids.get(team)
+            if team_id is None:
+                team_id = self._team_ids[team] = self._team_keys.get(name_key(team))
+            if team_id is None:
+                team_id = self._team_ids[team] = self._new_team(team)
+            for player in players:
+                name = player.get("name") if isinstance(player, dict) else None
+                if name and (team_id, name) not in self._player_ids:
+                    self._new_player(team_id, name)
+        self._has_squads = squads is not None
+
+    def _issue(self, code, source, team, name, message, suggestions=()):
+        issue = {"code": code, "source": source, "team": team, "name": name, "message": message,
+                 "suggestions": list(suggestions)}
+        self.issues.append(issue)
+        logger.warning("%s%s", f"{source}: " if source else "", message)
+
+    def team_id(self, name, source=None):
+        found = self._team_ids.get(name)
+        if found is not None:
+            return found
+        key = name_key(name)
+        found = self._team_keys.get(key)
+        if found is not None:
+            self._issue("variant_spelling", source, name, None,
+                        f"команда «{name}» записана иначе, чем «{self.teams[found]}»", [self.teams[found]])
+        else:
+            close = [self.teams[self._team_keys[match]]
+                     for match in difflib.get_close_matches(key, self._team_keys, n=2, cutoff=MISSPELLING_CUTOFF)]
+            if self._has_squads:
+                self._issue("unknown_team", source, name, None, f"команды «{name}» нет в составах", close)
+            elif close:
+                self._issue("misspelled_team", source, name, None,
+                            f"команда «{name}» похожа на «{'», «'.join(close)}»", close)
+            found = self._new_team(name)
+        self._team_ids[name] = found
+        return found
+
+    def _new_team(self, name):
+        team_id = self._team_keys[name_key(name)] = len(self.teams)
+        self.teams.append(name)
+        self._player_keys[team_id] = {}
+        return team_id
+
+    def _new_player(self, team_id, name):
+        player_id = self._player_ids[team_id, name] = len(self.player_names)
+        self._player_keys[team_id].setdefault(name_key(name), player_id)
+        self.player_names.append(name)
+        self.player_teams.append(team_id)
+        return player_id
+
+    def _abbreviated(self, team_id, words):
+        # Игроки команды, под которых подходит сокращение «Фамилия И.» (и «Фамилия И. О.»)
+        surname = [word for word in words if not _INITIAL.match(word)]
+        initials = [word[0] for word in words if _INITIAL.match(word)]
+        found = []
+        for key, player_id in self._player_keys[team_id].items():
+            parts = key.split()
+            if parts[:len(surname)] == surname and len(parts) >= len(surname) + len(initials) and all(
+                    part.startswith(initial) for part, initial in zip(parts[len(surname):], initials)):
+                found.append(player_id)
+        return found
+
+    def player_id(self, team, name, source=None):
+        # Номер игрока команды team (название); неизвестное имя получает новый номер
+        team_id = self.team_id(team, source)
+        found = self._player_ids.get((team_id, name))
+        if found is not None:
+            return found
+        key = name_key(name)
+        known = self._player_keys[team_id]
+        if key in known:
+            found = self._player_ids[team_id, name] = known[key]
+            self._issue("variant_spelling", source, team, name,
+                        f"игрок «{name}» ({team}) записан иначе, чем «{self.player_names[found]}»",
+                        [self.player_names[found]])
+            return found
+
+        words = key.split()
+        if any(_INITIAL.match(word) for word in words):
+            candidates = [self.player_names[player_id] for player_id in self._abbreviated(team_id, words)]
+            if len(candidates) == 1:
+                self._issue("abbreviated_name", source, team, name,
+                            f"«{name}» ({team}) — сокращение имени «{candidates[0]}»", candidates)
+            elif candidates:
+                self._issue("ambiguous_name", source, team, name,
+                            f"«{name}» ({team}) может означать: {', '.join(candidates)}", candidates)
+            if candidates:
+                return self._new_player(team_id, name)
+
+        close = difflib.get_close_matches(key, known, n=2, cutoff=MISSPELLING_CUTOFF)
+        if close:
+            candidates = [self.player_names[known[match]] for match in close]
+            self._issue("misspelled_name", source, team, name,
+                        f"«{name}» ({team}) похоже на «{'», «'.join(candidates)}»", candidates)
+        elif self._has_squads:
+            self._issue("unknown_player", source, team, name, f"игрока «{name}» нет в составе {team}")
+        return self._new_player(team_id, name)
+
+    def find(self, team, name):
+        # Номер уже известного игрока (с учётом другого написания) или None; новых номеров не заводит
+        team_id = self._team_ids.get(team, self._team_keys.get(name_key(team)))
+        if team_id is None:
+            return None
+        found = self._player_ids.get((team_id, name))
+        return found if found is not None else self._player_keys[team_id].get(name_key(name))
+
+    def team_dtype(self):
+        # Категории — названия команд в порядке номеров: код категории равен номеру команды
+        return pd.CategoricalDtype(self.teams)
+
+    def names(self, player_ids):
+        # Имена и команды игроков по массиву номеров
+        player_ids = np.asarray(player_ids, dtype=np.int64)
+        names = np.asarray(self.player_names, dtype=object)[player_ids]
+        teams = np.asarray(self.teams, dtype=object)[np.asarray(self.player_teams, dtype=np.int64)[player_ids]]
+        return names, teams
@@ -0,0 +1,119 @@
+"""Неизменяемая модель составов: команды и игроки.
+
+Записи — объекты со __slots__ без __dict__, строки (имена, команды, позиции)
+интернированы, поэтому повторяющиеся значения хранятся в памяти один раз.
+Модель строится один раз на версию squads.json и общая для всех сессий; изменить
+запись нельзя (AttributeError), поэтому страницы не могут испортить общие данные.
+
+Замер памяти против словарей JSON: python benchmarks.py memory
+"""
+import sys
+from types import MappingProxyType
+
+import pandas as pd
+
+from data_loader import SQUADS_FILE, cached_derived, read_compiled, read_json
+
+
+def _text(value):
+    return None if value is None else sys.intern(str(value))
+
+
+class Record:
+    """Запись только для чтения; поля перечислены в __slots__ подкласса."""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} только для чтения")
+
+    __delattr__ = __setattr__
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+    def as_dict(self):
+        return dict(zip(self.__slots__, self._values()))
+
+
+class Player(Record):
+    __slots__ = ("name", "team", "number", "position")
+
+
+class Team(Record):
+    __slots__ = ("name", "players")
+
+
+class Squads(Record):
+    """Составы команд: кортеж Team и доступ по названию команды."""
+
+    __slots__ = ("teams", "by_team")
+
+    def __init__(self, teams):
+        teams = tuple(teams)
+        super().__init__(teams, MappingProxyType({team.name: team for team in teams}))
+
+    def __hash__(self):
+        # by_team строится из teams
+        return hash(self.teams)
+
+    @property
+    def team_names(self):
+        return tuple(self.by_team)
+
+    def players(self, team):
+        found = self.by_team.get(team)
+        return found.players if found else ()
+
+    def as_json(self):
+        # Вид squads.json (для скачивания и выгрузок)
+        return {team.name: [{"name": p.name, "number": p.number, "position": p.position} for p in team.players]
+                for team in self.teams}
+
+
+def build_squads(squads):
+    teams = []
+    for team, players in squads.items():
+        team = _text(team)
+        teams.append(Team(team, tuple(Player(_text(player["name"]), team, player.get("number"),
+                                             _text(player.get("position"))) for player in players)))
+    return Squads(teams)
+
+
+def squads_model(path=SQUADS_FILE):
+    # squads.json (или его снимок ingest.py) читается без общего кэша файлов: в памяти остаётся только модель
+    return cached_derived("squads_model", (path,), lambda: build_squads(read_compiled(path, read_json)))
+
+
+def deep_size(obj, seen=None):
+    # Память объекта со всем, на что он ссылается; общие объекты (интернированные строки) считаются один раз
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=True).sum()) if isinstance(obj, pd.DataFrame) else \
+            int(obj.memory_usage(deep=True))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, MappingProxyType):
+        size += sys.getsizeof(dict(obj))
+    if isinstance(obj, (dict, MappingProxyType)):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(type(obj), "__slots__"):
+        size += sum(deep_size(getattr(obj, name), seen) for name in type(obj).__slots__)
+    return size
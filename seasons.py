@@ -0,0 +1,132 @@
+"""Сезоны и турниры: раскладка файлов данных по каталогам и манифест.
+
+Раскладка data/:
+
+    data/manifest.json
+    data/<сезон>/squads.json
+    data/<сезон>/<чемпионат>/matches.csv, schedule.csv, match_stats.json
+    data/<сезон>/cup/cup_matches.json, cup_match_stats.json
+
+Статистику матчей можно вести журналом JSON Lines (event_log.py): если рядом с
+match_stats.json или cup_match_stats.json есть одноимённый файл .jsonl, берётся он.
+
+Манифест перечисляет сезоны и чемпионаты (дивизионы) каждого сезона:
+
+    {
+        "default_season": "2025",
+        "seasons": {
+            "2025": {
+                "year": 2025,
+                "leagues": {"main": {"title": "Чемпионат Волжского района", "dir": "league",
+                                     "tiebreakers": ["h2h_points", "h2h_goal_diff", "goals_for"]}},
+                "cup": {"title": "Кубок Волжского района", "dir": "cup"}
+            }
+        }
+    }
+
+tiebreakers — критерии при равенстве очков (см. ranking.py), по умолчанию TIEBREAKERS.
+Если манифеста нет, используется единственный сезон из файлов в корне репозитория.
+Загружаются только файлы выбранного раздела; кэш data_loader вытесняет остальные.
+"""
+import os
+
+from data_loader import (CUP_MATCH_STATS_FILE, CUP_MATCHES_FILE, EVENT_LOG_SUFFIX, MATCH_STATS_FILE, MATCHES_FILE,
+                         SCHEDULE_FILE, SQUADS_FILE, file_exists, load_json)
+from ranking import TIEBREAKERS, check_tiebreakers
+
+DATA_DIR = "data"
+MANIFEST_FILE = os.path.join(DATA_DIR, "manifest.json")
+
+DEFAULT_YEAR = 2025
+DEFAULT_LEAGUE_TITLE = "Чемпионат Волжского района"
+DEFAULT_CUP_TITLE = "Кубок Волжского района"
+
+
+class Partition:
+    """Раздел данных: чемпионат одного сезона вместе с кубком этого сезона."""
+
+    def __init__(self, season, league, year, league_title, cup_title, files, tiebreakers=TIEBREAKERS,
+                 manifest=None):
+        self.season = season
+        self.league = league
+        self.year = year
+        self.league_title = league_title
+        self.cup_title = cup_title
+        self.files = files
+        self.tiebreakers = check_tiebreakers(tiebreakers)
+        # Манифест, из которого взят раздел (названия, регламент); None — корневые файлы без манифеста
+        self.manifest = manifest
+
+    @property
+    def key(self):
+        return f"{self.season}/{self.league}"
+
+    @property
+    def event_sources(self):
+        # Порядок файлов, который ожидает event_store
+        return (self.files["matches"], self.files["match_stats"], self.files["cup_matches"],
+                self.files["cup_match_stats"])
+
+    def __repr__(self):
+        return f"Partition({self.key!r})"
+
+
+def _match_stats_file(path):
+    # Журнал .jsonl рядом с файлом статистики используется вместо него
+    log = os.path.splitext(path)[0] + EVENT_LOG_SUFFIX
+    return log if file_exists(log) else path
+
+
+def legacy_partition():
+    return Partition(str(DEFAULT_YEAR), "main", DEFAULT_YEAR, DEFAULT_LEAGUE_TITLE, DEFAULT_CUP_TITLE, {
+        "matches": MATCHES_FILE,
+        "schedule": SCHEDULE_FILE,
+        "squads": SQUADS_FILE,
+        "match_stats": _match_stats_file(MATCH_STATS_FILE),
+        "cup_matches": CUP_MATCHES_FILE,
+        "cup_match_stats": _match_stats_file(CUP_MATCH_STATS_FILE),
+    })
+
+
+def _season_partitions(season, spec, data_dir, manifest_path):
+    season_dir = os.path.join(data_dir, spec.get("dir", season))
+    cup = spec.get("cup", {})
+    cup_dir = os.path.join(season_dir, cup.get("dir", "cup"))
+    year = int(spec.get("year", season))
+    for league, league_spec in spec.get("leagues", {}).items():
+        league_dir = os.path.join(season_dir, league_spec.get("dir", league))
+        yield Partition(season, league, year, league_spec.get("title", DEFAULT_LEAGUE_TITLE),
+                        cup.get("title", DEFAULT_CUP_TITLE), {
+                            "matches": os.path.join(league_dir, MATCHES_FILE),
+                            "schedule": os.path.join(league_dir, SCHEDULE_FILE),
+                            "match_stats": _match_stats_file(os.path.join(league_dir, MATCH_STATS_FILE)),
+                            "squads": os.path.join(season_dir, SQUADS_FILE),
+                            "cup_matches": os.path.join(cup_dir, CUP_MATCHES_FILE),
+                            "cup_match_stats": _match_stats_file(os.path.join(cup_dir, CUP_MATCH_STATS_FILE)),
+                        }, league_spec.get("tiebreakers", TIEBREAKERS), manifest_path)
+
+
+def partitions(manifest_path=MANIFEST_FILE):
+    # Все разделы по манифесту, от новых сезонов к старым; без манифеста — корневые файлы
+    if not file_exists(manifest_path):
+        return [legacy_partition()]
+    manifest = load_json(manifest_path)
+    data_dir = os.path.dirname(manifest_path)
+    seasons = sorted(manifest.get("seasons", {}).items(), key=lambda item: item[0], reverse=True)
+    return [partition for season, spec in seasons for partition in _season_partitions(season, spec, data_dir, manifest_path)]
+
+
+def default_season(manifest_path=MANIFEST_FILE):
+    if not file_exists(manifest_path):
+        return str(DEFAULT_YEAR)
+    manifest = load_json(manifest_path)
+    return manifest.get("default_season") or max(manifest.get("seasons", {str(DEFAULT_YEAR): None}))
+
+
+def get_partition(season=None, league=None, manifest_path=MANIFEST_FILE):
+    # Раздел по сезону и чемпионату; неизвестные значения заменяются разделом по умолчанию
+    available = partitions(manifest_path)
+    season = season or default_season(manifest_path)
+    in_season = [partition for partition in available if partition.season == season] or \
+        [partition for partition in available if partition.season == default_season(manifest_path)] or available
+    return next((partition for partition in in_season if partition.league == league), in_season[0])
@@ -0,0 +1,248 @@
+"""Шансы команд на итоговые места: моделирование оставшихся матчей чемпионата.
+
+Сила команд оценивается по сыгранным матчам matches.csv пуассоновской моделью:
+голы хозяев ~ Pois(преимущество поля × атака хозяев × оборона гостей), голы гостей ~
+Pois(атака гостей × оборона хозяев). Оценки притягиваются к среднему по лиге
+(PRIOR_MATCHES условных матчей), чтобы в начале сезона пара результатов не решала всё.
+
+Оставшиеся матчи — строки schedule.csv без результата в matches.csv. Счёт всех
+оставшихся матчей разыгрывается сразу для пачки сезонов массивами NumPy, итоговая
+таблица каждого сезона упорядочивается по регламенту раздела (ranking.py): личные
+встречи считаются внутри каждой группы равных команд всех сезонов пачки одновременно.
+Штрафные очки fair play берутся текущие — карточки будущих матчей не моделируются.
+
+Пачки распределяются по процессам (FOOTBALL_SIM_WORKERS, по умолчанию — число ядер);
+у каждой пачки своё зерно, поэтому результат не зависит от числа процессов.
+Скорость — около 55 мкс на сезон на одно ядро для 20 команд и половины оставшегося
+сезона (11 мкс для 8 команд; замер — python benchmarks.py): 1 000 000 сезонов —
+около минуты на одном ядре и несколько секунд на 10–12 ядрах. Поэтому страница анонса
+считает по INTERACTIVE_SIMULATIONS_PER_WORKER сезонов на процесс (не больше
+SIMULATIONS), а полный миллион — из командной строки.
+Результат кэшируется до изменения matches.csv, schedule.csv или match_stats.json.
+
+Запуск из командной строки: python simulation.py [сезон] [чемпионат] [--simulations N]
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_loader import cached_derived, file_exists, load_matches, load_schedule
+from ranking import TIEBREAKERS, fair_play_points, incidence, rank_many, team_sums
+from seasons import get_partition
+from standings import DRAWS, GOALS_AGAINST, GOALS_FOR, WINS, league_standings_store
+
+SIMULATIONS = 1_000_000
+# Сезонов на процесс для страницы анонса: около 5 с на ядро для 20 команд
+INTERACTIVE_SIMULATIONS_PER_WORKER = 100_000
+SEED = 2025
+RELEGATED = 1
+
+PRIOR_MATCHES = 2
+DEFAULT_GOALS = 1.5
+FIT_ITERATIONS = 50
+
+# Голы разыгрываются по таблице квантилей: равномерный код → число голов (не больше MAX_GOALS)
+QUANTILES = 1 << 16
+MAX_GOALS = 20
+
+# Пачка ограничена числом ячеек массивов (сезоны × команды² или сезоны × матчи)
+BATCH_CELLS = 1_000_000
+MIN_BATCH = 1_000
+WORKERS_ENV = "FOOTBALL_SIM_WORKERS"
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def fit_strengths(home, away, home_goals, away_goals, n_teams):
+    # Атака, оборона команд и преимущество поля; home и away — коды команд сыгранных матчей
+    home_goals, away_goals = np.asarray(home_goals, dtype=float), np.asarray(away_goals, dtype=float)
+    mean = (home_goals.sum() + away_goals.sum()) / (2 * len(home)) if len(home) else DEFAULT_GOALS
+    prior = PRIOR_MATCHES * mean
+    scored = np.bincount(home, home_goals, n_teams) + np.bincount(away, away_goals, n_teams)
+    conceded = np.bincount(home, away_goals, n_teams) + np.bincount(away, home_goals, n_teams)
+
+    attack, defence, advantage = np.full(n_teams, mean), np.ones(n_teams), 1.0
+    for _ in range(FIT_ITERATIONS):
+        faced = np.bincount(home, advantage * defence[away], n_teams) + np.bincount(away, defence[home], n_teams)
+        attack = (scored + prior) / (faced + PRIOR_MATCHES)
+        faced = np.bincount(away, advantage * attack[home], n_teams) + np.bincount(home, attack[away], n_teams)
+        defence = (conceded + prior) / (faced + prior)
+        advantage = (home_goals.sum() + prior) / ((attack[home] * defence[away]).sum() + prior)
+    return attack, defence, advantage
+
+
+def goal_table(rates):
+    # Квантили распределения Пуассона: голы = таблица[матч, равномерный код 0..QUANTILES-1]
+    goals = np.arange(MAX_GOALS + 1)
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(goals[1:]))])
+    pmf = np.exp(goals * np.log(rates[:, None]) - rates[:, None] - log_factorial)
+    cdf = np.cumsum(pmf, axis=1)
+    levels = (np.arange(QUANTILES) + 0.5) / QUANTILES
+    table = np.array([np.searchsorted(row, levels) for row in cdf], dtype=np.int64).clip(max=MAX_GOALS)
+    return table.astype(np.uint8).reshape(len(rates), QUANTILES)
+
+
+def _simulate_batch(task):
+    # Счётчики мест одной пачки сезонов: строки — команды, столбцы — места
+    seed, size, model = task
+    home, away = model["home"], model["away"]
+    n_teams, n_matches = len(model["counts"]), len(home)
+    rng = np.random.default_rng(seed)
+    codes = rng.integers(0, QUANTILES, (size, 2 * n_matches), dtype=np.uint16)
+    goals = np.take(model["goal_table"], codes + model["offsets"])
+    home_goals, away_goals = goals[:, :n_matches], goals[:, n_matches:]
+
+    hosts, guests = incidence(home, n_teams), incidence(away, n_teams)
+    none = np.zeros_like(hosts)
+    wins, draws, goals_for, goals_against = team_sums(
+        [home_goals > away_goals, away_goals > home_goals, home_goals == away_goals, home_goals, away_goals],
+        [[hosts, none, none, none], [guests, none, none, none], [none, hosts + guests, none, none],
+         [none, none, hosts, guests], [none, none, guests, hosts]])
+    wins += model["counts"][:, WINS]
+    draws += model["counts"][:, DRAWS]
+    goals_for += model["counts"][:, GOALS_FOR]
+    goals_against += model["counts"][:, GOALS_AGAINST]
+    totals = {"points": 3 * wins + draws, "goal_diff": goals_for - goals_against, "goals_for": goals_for,
+              "wins": wins}
+
+    positions = rank_many(totals, model["h2h"], home, away, home_goals.astype(np.int16),
+                          away_goals.astype(np.int16), model["tiebreakers"], model["penalties"], model["alphabet"])
+    slots = np.arange(n_teams) * n_teams + positions
+    return np.bincount(slots.ravel(), minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+
+
+def _workers():
+    return max(1, int(os.environ.get(WORKERS_ENV) or os.cpu_count() or 1))
+
+
+def interactive_simulations():
+    # Число сезонов для страницы: SIMULATIONS только при 10 и более процессах
+    return min(SIMULATIONS, INTERACTIVE_SIMULATIONS_PER_WORKER * _workers())
+
+
+def _executor(workers):
+    # Пул процессов общий для всех расчётов; spawn — потому что сервер Streamlit многопоточный
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def simulate(teams, counts, h2h, played, fixtures, simulations=SIMULATIONS, tiebreakers=TIEBREAKERS,
+             penalties=None, seed=SEED, workers=None):
+    # Вероятности мест: DataFrame команда × место (1..n). counts и h2h — текущие показатели в порядке teams,
+    # played — (хозяева, гости, голы хозяев, голы гостей) сыгранных матчей в кодах команд,
+    # fixtures — (хозяева, гости) оставшихся матчей
+    teams = [str(team) for team in teams]
+    n_teams = len(teams)
+    home, away = (np.asarray(codes, dtype=np.int64) for codes in fixtures)
+    if not len(home):
+        # Все матчи сыграны: исход один
+        simulations = 1
+    attack, defence, advantage = fit_strengths(*played, n_teams)
+    rates = np.concatenate([advantage * attack[home] * defence[away], attack[away] * defence[home]])
+    model = {"home": home, "away": away, "goal_table": goal_table(rates).ravel(),
+             "offsets": (np.arange(len(rates)) * QUANTILES).astype(np.int32),
+             "counts": np.asarray(counts, dtype=np.int64),
+             "h2h": np.asarray(h2h, dtype=np.int64), "tiebreakers": tuple(tiebreakers),
+             "penalties": None if penalties is None else np.asarray(penalties, dtype=np.int64),
+             "alphabet": np.argsort(np.argsort(teams, kind="stable"))}
+
+    batch = max(MIN_BATCH, BATCH_CELLS // max(n_teams * n_teams, len(home), 1))
+    sizes = [min(batch, simulations - start) for start in range(0, simulations, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(child, size, model) for child, size in zip(seeds, sizes)]
+    workers = min(_workers() if workers is None else workers, len(tasks))
+    if workers > 1:
+        results = _executor(workers).map(_simulate_batch, tasks)
+    else:
+        results = map(_simulate_batch, tasks)
+    positions = sum(results, np.zeros((n_teams, n_teams), dtype=np.int64))
+
+    odds = pd.DataFrame(positions / max(simulations, 1), index=pd.Index(teams, name="Команда"),
+                        columns=range(1, n_teams + 1))
+    expected = odds.to_numpy() @ np.arange(1, n_teams + 1)
+    return odds.iloc[np.argsort(expected, kind="stable")]
+
+
+def remaining_fixtures(matches, schedule):
+    # Строки расписания, для которых в matches.csv ещё нет результата
+    played = matches.dropna(subset=["Голы хозяев", "Голы гостей"])
+    known = pd.MultiIndex.from_frame(played[["Тур", "Хозяева", "Гости"]])
+    keys = pd.MultiIndex.from_frame(schedule[["Тур", "Хозяева", "Гости"]])
+    return schedule[~keys.isin(known)]
+
+
+def _build_odds(partition, simulations, seed):
+    matches = load_matches(partition.files["matches"])
+    remaining = remaining_fixtures(matches, load_schedule(partition.files["schedule"]))
+    store = league_standings_store(partition.files["matches"])
+    counts, h2h = store.totals()
+
+    # Команды, которые есть только в расписании, начинают с нуля
+    new_teams = pd.Index(pd.unique(remaining[["Хозяева", "Гости"]].values.ravel())).difference(store.teams)
+    teams = pd.Index(np.concatenate([store.teams, new_teams]))
+    extra = len(new_teams)
+    counts = np.pad(counts, ((0, extra), (0, 0)))
+    h2h = np.pad(h2h, ((0, 0), (0, extra), (0, extra)))
+
+    played = matches.dropna(subset=["Голы хозяев", "Голы гостей"])
+    played = (teams.get_indexer(played["Хозяева"]), teams.get_indexer(played["Гости"]),
+              played["Голы хозяев"].to_numpy(dtype=np.int64), played["Голы гостей"].to_numpy(dtype=np.int64))
+    fixtures = (teams.get_indexer(remaining["Хозяева"]), teams.get_indexer(remaining["Гости"]))
+    try:
+        penalties = fair_play_points(partition.files["match_stats"], teams)
+    except FileNotFoundError:
+        penalties = None
+    return simulate(teams, counts, h2h, played, fixtures, simulations, partition.tiebreakers, penalties, seed)
+
+
+def season_odds(partition, simulations=SIMULATIONS, seed=SEED):
+    # Общий для всех сессий результат; пересчитывается после внесения новых результатов
+    name = f"season_odds:{simulations}:{seed}:{','.join(partition.tiebreakers)}"
+    # match_stats.json — штрафные очки fair play для равенства очков (если файл есть)
+    paths = (partition.files["matches"], partition.files["schedule"])
+    if file_exists(partition.files["match_stats"]):
+        paths += (partition.files["match_stats"],)
+    return cached_derived(name, paths, lambda: _build_odds(partition, simulations, seed))
+
+
+def odds_summary(odds, relegated=RELEGATED):
+    # Чемпион, призёры и зона вылета по распределению мест
+    return pd.DataFrame({
+        "Чемпион": odds[1],
+        "Призёры": odds.loc[:, :3].sum(axis=1),
+        "Вылет": odds.loc[:, len(odds.columns) - relegated + 1:].sum(axis=1) if relegated else 0.0,
+        "Среднее место": odds.to_numpy() @ np.arange(1, len(odds.columns) + 1),
+    }, index=odds.index)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Шансы команд на итоговые места")
+    parser.add_argument("season", nargs="?")
+    parser.add_argument("league", nargs="?")
+    parser.add_argument("--simulations", type=int, default=SIMULATIONS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    if args.workers:
+        os.environ[WORKERS_ENV] = str(args.workers)
+
+    selected = get_partition(args.season, args.league)
+    start = time.perf_counter()
+    summary = odds_summary(season_odds(selected, args.simulations))
+    elapsed = time.perf_counter() - start
+    with pd.option_context("display.float_format", "{:.3f}".format, "display.width", 120):
+        print(summary)
+    print(f"{args.simulations} сезонов за {elapsed:.2f} с")
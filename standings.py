@@ -0,0 +1,371 @@
+"""Турнирная таблица чемпионата.
+
+Таблица считается векторно: результаты матчей раскладываются на строки хозяев
+и гостей, а суммы по командам набираются через np.bincount. Равные по очкам
+команды упорядочиваются по критериям ranking.py.
+
+StandingsStore хранит показатели после каждого тура и при появлении новых
+результатов досчитывает только затронутые туры. Матрица личных встреч на тур
+строится при первом запросе таблицы на этот тур и хранится до следующего обновления.
+
+Ход сезона (очки, место и разница мячей после каждого тура) берётся из тех же
+накопленных сумм тур × команда: места всех туров расставляются одним вызовом
+ranking.rank_many, очки за последние FORM_MATCHES туров — разность накопленных сумм.
+Форма и серии считаются по последовательности матчей каждой команды без циклов по турам.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_loader import MATCHES_FILE, file_version, load_matches, on_refresh
+from ranking import TIEBREAKERS, fair_play_history, fair_play_points, head_to_head, rank, rank_many
+
+TABLE_COLUMNS = ["№", "Команда", "Игры", "Победы", "Ничьи", "Поражения", "Забито", "Пропущено",
+                 "Разница мячей", "Очки"]
+
+PROGRESSION_COLUMNS = ["Тур", "Команда", "Очки", "Место", "Разница мячей", "Очки за 5 туров"]
+FORM_COLUMNS = ["Команда", "Форма", "Серия", "Без поражений", "Без побед"]
+
+# Столбцы массива накопленных показателей команды
+WINS, DRAWS, LOSSES, GOALS_FOR, GOALS_AGAINST = range(5)
+
+FORM_MATCHES = 5
+# Результат матча для команды: индекс буквы — знак разницы мячей + 1
+RESULT_LETTERS = np.array(["П", "Н", "В"])
+# Туров в одном вызове rank_many: массивы туры × матчи не растут с длиной сезона
+PROGRESSION_CELLS = 1_000_000
+
+
+def _team_codes(matches, teams):
+    codes = pd.Index(teams)
+    return (codes.get_indexer(matches["Хозяева"].to_numpy()),
+            codes.get_indexer(matches["Гости"].to_numpy()))
+
+
+def _counts(played, teams, groups=None, n_groups=1):
+    # Показатели команд (W, D, L, GF, GA) по группам матчей, форма (n_groups, n_teams, 5)
+    home, away = _team_codes(played, teams)
+    hg = played["Голы хозяев"].to_numpy(dtype=np.int64)
+    ag = played["Голы гостей"].to_numpy(dtype=np.int64)
+
+    n = len(teams)
+    if groups is None:
+        groups = np.zeros(len(played), dtype=np.int64)
+    slots = np.concatenate([groups * n + home, groups * n + away])
+    scored = np.concatenate([hg, ag])
+    conceded = np.concatenate([ag, hg])
+
+    counts = np.empty((n_groups * n, 5), dtype=np.int64)
+    for column, values in ((WINS, scored > conceded), (DRAWS, scored == conceded),
+                           (LOSSES, scored < conceded), (GOALS_FOR, scored), (GOALS_AGAINST, conceded)):
+        counts[:, column] = np.bincount(slots, weights=values, minlength=n_groups * n)
+    return counts.reshape(n_groups, n, 5)
+
+
+def _head_to_head(played, teams, groups=None, n_groups=1):
+    home, away = _team_codes(played, teams)
+    return head_to_head(home, away, played["Голы хозяев"].to_numpy(dtype=np.int64),
+                        played["Голы гостей"].to_numpy(dtype=np.int64), len(teams), groups, n_groups)
+
+
+def _table(teams, counts, h2h, tiebreakers=TIEBREAKERS, fair_play=None):
+    teams = np.asarray(teams, dtype=object)
+    wins, draws, losses, goals_for, goals_against = counts.T
+    points = 3 * wins + draws
+    goal_diff = goals_for - goals_against
+    order = rank(teams, counts, h2h, tiebreakers, fair_play)
+
+    return pd.DataFrame({
+        "№": np.arange(1, len(teams) + 1),
+        "Команда": teams[order],
+        "Игры": (wins + draws + losses)[order],
+        "Победы": wins[order],
+        "Ничьи": draws[order],
+        "Поражения": losses[order],
+        "Забито": goals_for[order],
+        "Пропущено": goals_against[order],
+        "Разница мячей": goal_diff[order],
+        "Очки": points[order],
+    }, columns=TABLE_COLUMNS)
+
+
+def compute_standings(matches, tiebreakers=TIEBREAKERS, fair_play=None):
+    # Команды без сыгранных матчей тоже попадают в таблицу с нулями
+    teams = pd.unique(matches[["Хозяева", "Гости"]].values.ravel())
+    played = matches.dropna(subset=["Голы хозяев", "Голы гостей"])
+    return _table(teams, _counts(played, teams)[0], _head_to_head(played, teams)[0], tiebreakers, fair_play)
+
+
+class StandingsStore:
+    """Снимки таблицы после каждого тура с дозаписью новых результатов."""
+
+    def __init__(self):
+        self.teams = np.array([], dtype=object)
+        self.rounds = np.array([], dtype=np.int64)
+        self._cumulative = np.zeros((0, 0, 5), dtype=np.int64)
+        self._played = None
+        self._h2h = {}
+        self._progression = {}
+        self._rows = None
+        self.rows_applied = 0
+        self.version = None
+
+    def _first_changed_round(self, rows, teams):
+        # Самый ранний тур, затронутый новыми или исправленными строками, и новый список команд;
+        # None — пересчитывать нечего, (None, None) — нужен полный пересчёт
+        rounds, home, away, goals = rows
+        known = self.rows_applied
+        if not known or len(rounds) < known:
+            return None, None
+
+        old_rounds, old_home, old_away, old_goals = self._rows
+        same_goals = (goals[:known] == old_goals) | (np.isnan(goals[:known]) & np.isnan(old_goals))
+        changed = np.flatnonzero((rounds[:known] != old_rounds) | (home[:known] != old_home) |
+                                 (away[:known] != old_away) | ~same_goals.all(axis=1))
+        touched = np.concatenate([changed, np.arange(known, len(rounds))])
+        if not len(touched):
+            return None
+
+        names = np.column_stack([home[touched], away[touched]]).ravel()
+        new_teams = pd.unique(names[pd.Index(teams).get_indexer(names) == -1])
+        if len(changed):
+            # Исправленные строки могут убрать команду (опечатку в названии) или изменить порядок
+            # появления команд: тогда список команд строится заново, а таблица пересчитывается полностью
+            all_teams = pd.unique(np.column_stack([home, away]).ravel())
+            if not np.array_equal(all_teams, np.concatenate([teams, new_teams])):
+                return None, None
+
+        first_round = np.concatenate([rounds[touched], old_rounds[changed]]).min()
+        return first_round, np.concatenate([teams, new_teams])
+
+    def update(self, matches):
+        # Возвращает число заново обработанных строк matches
+        rounds = matches["Тур"].to_numpy(dtype=np.int64)
+        rows = (rounds, matches["Хозяева"].to_numpy(), matches["Гости"].to_numpy(),
+                matches[["Голы хозяев", "Голы гостей"]].to_numpy(dtype=float, na_value=np.nan))
+
+        changes = self._first_changed_round(rows, self.teams)
+        if changes is None:
+            return 0
+        first_round, teams = changes
+        keep = 0
+        if first_round is None:
+            teams = pd.unique(matches[["Хозяева", "Гости"]].values.ravel())
+            first_round = rounds.min() if len(rounds) else 0
+        else:
+            # Снимки до первого затронутого тура остаются, остальные досчитываются
+            keep = int(np.searchsorted(self.rounds, first_round))
+
+        n = len(teams)
+        if keep:
+            # При дозаписи команды только добавляются в конец списка
+            old = np.pad(self._cumulative[:keep], ((0, 0), (0, n - self._cumulative.shape[1]), (0, 0)))
+        else:
+            old = np.zeros((0, n, 5), dtype=np.int64)
+        base = old[-1] if keep else np.zeros((n, 5), dtype=np.int64)
+
+        tail = matches[rounds >= first_round].dropna(subset=["Голы хозяев", "Голы гостей"])
+        tail_rounds = np.unique(rounds[rounds >= first_round])
+        groups = np.searchsorted(tail_rounds, tail["Тур"].to_numpy(dtype=np.int64))
+        deltas = _counts(tail, teams, groups, len(tail_rounds))
+
+        self._cumulative = np.concatenate([old, base + np.cumsum(deltas, axis=0)])
+        # Сыгранные матчи в кодах команд для матриц личных встреч: коды прежних команд не меняются
+        played = (tail["Тур"].to_numpy(dtype=np.int64), *_team_codes(tail, teams),
+                  tail["Голы хозяев"].to_numpy(dtype=np.int64), tail["Голы гостей"].to_numpy(dtype=np.int64))
+        if keep and self._played is not None:
+            kept = self._played[0] < first_round
+            played = tuple(np.concatenate([old_values[kept], values])
+                           for old_values, values in zip(self._played, played))
+        self._played = played
+        self._h2h = {}
+        self._progression = {}
+        self.rounds = np.concatenate([self.rounds[:keep], tail_rounds])
+        self.teams = teams
+        self._rows = rows
+        self.rows_applied = len(matches)
+        return int((rounds >= first_round).sum())
+
+    def table_as_of(self, round_=None, tiebreakers=TIEBREAKERS, fair_play=None):
+        # Таблица после тура round_ (по умолчанию — после последнего); fair_play(teams, round_) —
+        # штрафные очки команд, запрашиваются, только если до этого критерия дошло дело
+        penalties = (lambda: fair_play(self.teams, round_)) if fair_play else None
+        return _table(self.teams, *self.totals(round_), tiebreakers, penalties)
+
+    def totals(self, round_=None):
+        # Показатели команд (n, 5) в порядке self.teams и матрицы личных встреч после тура round_
+        position = len(self.rounds) if round_ is None else int(np.searchsorted(self.rounds, round_, side="right"))
+        if position == 0:
+            return np.zeros((len(self.teams), 5), dtype=np.int64), self.head_to_head(0)
+        return self._cumulative[position - 1], self.head_to_head(position)
+
+    def head_to_head(self, position):
+        # Матрицы личных встреч по первым position турам; одна на тур до следующего update
+        matrix = self._h2h.get(position)
+        if matrix is None:
+            n = len(self.teams)
+            if position == 0 or self._played is None:
+                matrix = np.zeros((2, n, n), dtype=np.int32)
+            else:
+                rounds, home, away, home_goals, away_goals = self._played
+                mask = rounds <= self.rounds[position - 1]
+                matrix = head_to_head(home[mask], away[mask], home_goals[mask], away_goals[mask], n)[0]
+            self._h2h[position] = matrix
+        return matrix
+
+    def progression(self, tiebreakers=TIEBREAKERS, fair_play=None):
+        # Очки, место и разница мячей каждой команды после каждого тура (длинная таблица для графика);
+        # fair_play(teams, rounds) — штрафные очки (туры × команды), запрашиваются только для этого критерия
+        tiebreakers = tuple(tiebreakers)
+        frame = self._progression.get(tiebreakers)
+        if frame is not None:
+            return frame
+        # Туры без сыгранных матчей (ещё не начатые) в ход сезона не входят
+        shown = np.isin(self.rounds, self._played[0]) if self._played is not None else np.zeros(0, dtype=bool)
+        round_numbers, cumulative = self.rounds[shown], self._cumulative[shown]
+        n_rounds, n_teams = len(round_numbers), len(self.teams)
+        points = 3 * cumulative[:, :, WINS] + cumulative[:, :, DRAWS]
+        goal_diff = cumulative[:, :, GOALS_FOR] - cumulative[:, :, GOALS_AGAINST]
+        # Очки за последние FORM_MATCHES туров — скользящее окно по накопленной сумме
+        recent = points - np.concatenate([np.zeros((FORM_MATCHES, n_teams), dtype=np.int64), points])[:n_rounds]
+
+        places = np.zeros((n_rounds, n_teams), dtype=np.int64)
+        if n_rounds and self._played is not None:
+            rounds, home, away, home_goals, away_goals = self._played
+            penalties = fair_play(self.teams, round_numbers) if fair_play and "fair_play" in tiebreakers else None
+            totals = {"points": points, "goal_diff": goal_diff, "goals_for": cumulative[:, :, GOALS_FOR],
+                      "wins": cumulative[:, :, WINS]}
+            alphabet = np.argsort(np.argsort(self.teams.astype(str), kind="stable"))
+            zero = np.zeros((2, n_teams, n_teams), dtype=np.int64)
+            step = max(1, PROGRESSION_CELLS // max(len(rounds), 1))
+            for start in range(0, n_rounds, step):
+                chunk = slice(start, start + step)
+                played = rounds[None, :] <= round_numbers[chunk, None]
+                places[chunk] = rank_many(
+                    {name: values[chunk] for name, values in totals.items()}, zero, home, away,
+                    np.broadcast_to(home_goals, played.shape), np.broadcast_to(away_goals, played.shape),
+                    tiebreakers, None if penalties is None else penalties[chunk], alphabet, played)
+
+        frame = pd.DataFrame({
+            "Тур": np.repeat(round_numbers, n_teams),
+            "Команда": np.tile(self.teams, n_rounds),
+            "Очки": points.ravel(),
+            "Место": places.ravel() + 1,
+            "Разница мячей": goal_diff.ravel(),
+            "Очки за 5 туров": recent.ravel(),
+        }, columns=PROGRESSION_COLUMNS)
+        self._progression[tiebreakers] = frame
+        return frame
+
+    def form(self, round_=None):
+        # Последние FORM_MATCHES результатов (старые слева), текущая серия и серии без поражений и без побед
+        n_teams = len(self.teams)
+        if self._played is None:
+            rounds = home = away = home_goals = away_goals = np.array([], dtype=np.int64)
+        else:
+            rounds, home, away, home_goals, away_goals = self._played
+        if round_ is not None:
+            mask = rounds <= round_
+            rounds, home, away, home_goals, away_goals = (values[mask] for values in
+                                                          (rounds, home, away, home_goals, away_goals))
+
+        # Матчи каждой команды подряд: по командам, внутри — по турам и порядку строк
+        team = np.concatenate([home, away])
+        result = np.concatenate([np.sign(home_goals - away_goals), np.sign(away_goals - home_goals)])
+        order = np.lexsort((np.tile(np.arange(len(rounds)), 2), np.tile(rounds, 2), team))
+        team, result = team[order], result[order]
+        count = np.bincount(team, minlength=n_teams)
+        end = np.cumsum(count)
+        position = np.arange(len(team)) - (end - count)[team]
+        last = np.zeros(n_teams, dtype=np.int64)
+        last[count > 0] = result[end[count > 0] - 1]
+
+        def since(mask):
+            # Матчей после последнего матча, где выполнено mask
+            latest = np.full(n_teams, -1)
+            np.maximum.at(latest, team[mask], position[mask])
+            return count - 1 - latest
+
+        streak = since(result != last[team])
+        recent = position >= (count - FORM_MATCHES)[team]
+        letters = np.split(RESULT_LETTERS[result[recent] + 1], np.cumsum(np.bincount(team[recent],
+                                                                                     minlength=n_teams))[:-1])
+        return pd.DataFrame({
+            "Команда": self.teams,
+            "Форма": ["".join(row) for row in letters],
+            "Серия": [f"{RESULT_LETTERS[value + 1]}×{length}" if length else ""
+                      for value, length in zip(last, streak)],
+            "Без поражений": since(result < 0),
+            "Без побед": since(result > 0),
+        }, columns=FORM_COLUMNS)
+
+    def verify(self, matches):
+        # Сверка каждого снимка с полным пересчётом; возвращает туры с расхождениями
+        mismatched = []
+        for round_ in self.rounds:
+            # В таблице после тура — все команды файла, результаты последующих туров не учитываются
+            future = matches["Тур"] > round_
+            expected = compute_standings(matches.assign(**{
+                column: matches[column].mask(future) for column in ("Голы хозяев", "Голы гостей")
+            })).set_index("Команда")
+            actual = self.table_as_of(round_).set_index("Команда")
+            if not actual.index.sort_values().equals(expected.index.sort_values()) or \
+                    not expected.drop(columns="№").equals(actual.loc[expected.index].drop(columns="№")):
+                mismatched.append(int(round_))
+        return mismatched
+
+
+# Хранилища по файлам разных сезонов; давно не открывавшиеся вытесняются
+MAX_STORES = 8
+
+_stores = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def league_standings_store(path=MATCHES_FILE):
+    # Общее для всех сессий хранилище снимков; обновляется при смене версии файла
+    version = file_version(path)
+    with _stores_lock:
+        store = _stores.setdefault(path, StandingsStore())
+        _stores.move_to_end(path)
+        while len(_stores) > MAX_STORES:
+            _stores.popitem(last=False)
+        if store.version != version:
+            store.update(load_matches(path))
+            store.version = version
+    return store
+
+
+def league_table(partition, round_=None):
+    # Таблица раздела по его регламенту: критерии из манифеста, fair play по match_stats.json
+    def fair_play(teams, as_of):
+        try:
+            return fair_play_points(partition.files["match_stats"], teams, as_of)
+        except FileNotFoundError:
+            return None
+
+    return league_standings_store(partition.files["matches"]).table_as_of(round_, partition.tiebreakers, fair_play)
+
+
+def league_progression(partition):
+    # Ход сезона раздела по его регламенту (как league_table)
+    def fair_play(teams, rounds):
+        try:
+            return fair_play_history(partition.files["match_stats"], teams, rounds)
+        except FileNotFoundError:
+            return None
+
+    return league_standings_store(partition.files["matches"]).progression(partition.tiebreakers, fair_play)
+
+
+def _refresh_store(path):
+    # После изменения matches.csv (watcher.py) досчитать уже открытое хранилище заранее
+    with _stores_lock:
+        known = path in _stores
+    if known:
+        league_standings_store(path)
+
+
+on_refresh(_refresh_store)
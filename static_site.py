@@ -0,0 +1,256 @@
+"""Статическая версия сайта: HTML и JSON всех публичных представлений.
+
+Таблица (текущая и после каждого тура), результаты туров с событиями, страницы
+команд, кубок, статистика и анонс считаются функциями views.py и пишутся в каталог,
+который может раздавать nginx или CDN; Streamlit остаётся для интерактивной работы.
+
+Пересборка инкрементальная: группа страниц пересчитывается, только если изменились
+её исходные файлы (или дата для анонса), а файл переписывается, только если изменилось
+его содержимое. Ключи групп хранятся в <каталог>/.build.json.
+
+Запуск: python static_site.py <каталог> [--season 2025] [--league main] [--today 2025-07-01] [--force]
+"""
+import argparse
+import json
+import os
+from datetime import date
+from html import escape
+
+from cup_bracket import bracket_html
+from data_loader import data_version
+from player_search import tokens
+from seasons import partitions
+from views import (announcement_view, cup_view, dependency_paths, leaderboards_view, league_rounds, league_teams,
+                   round_view, standings_view, team_view)
+
+BUILD_FILE = ".build.json"
+# Меняется вместе с шаблонами, чтобы пересобрать всё
+TEMPLATE_VERSION = 2
+
+NAVIGATION = [("index", "Таблица"), ("rounds/index", "Туры"), ("teams/index", "Команды"), ("cup", "Кубок"),
+              ("stats", "Статистика"), ("announcement", "Анонс")]
+KIND_TITLES = {"goals": "Голы", "yellow_cards": "Жёлтые", "red_cards": "Красные"}
+COMPETITION_TITLES = {"league": "Чемпионат", "cup": "Кубок"}
+
+CSS = """
+<style>
+    body { font-family: sans-serif; max-width: 1100px; margin: 0 auto; padding: 16px; color: #222; }
+    nav a { margin-right: 14px; }
+    table { border-collapse: collapse; margin: 10px 0 24px; }
+    th, td { border-bottom: 1px solid #ddd; padding: 4px 10px; text-align: left; }
+    th { background: #f0f2f6; }
+    details { margin: 4px 0 12px; }
+</style>
+"""
+
+
+def slugify(text):
+    return "-".join(tokens(text)) or "team"
+
+
+def table_html(rows, columns=None, titles=None):
+    if not rows:
+        return "<p>Нет данных</p>"
+    columns = columns or list(rows[0])
+    titles = titles or {}
+    head = "".join(f"<th>{escape(str(titles.get(column, column)))}</th>" for column in columns)
+    body = "".join("<tr>" + "".join(f"<td>{escape('' if row.get(column) is None else str(row[column]))}</td>"
+                                    for column in columns) + "</tr>" for row in rows)
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def links_html(items):
+    return "<p>" + " · ".join(f'<a href="{escape(href)}">{escape(label)}</a>' for href, label in items) + "</p>"
+
+
+def page_html(partition, name, title, body):
+    # Ссылки относительные, чтобы каталог можно было выложить по любому пути
+    root = "../" * name.count("/")
+    nav = " ".join(f'<a href="{root}{target}.html">{label}</a>' for target, label in NAVIGATION)
+    heading = f"{partition.league_title} по футболу {partition.year} года"
+    return (f'<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8"><title>{escape(title)} — '
+            f'{escape(heading)}</title>{CSS}</head><body><nav>{nav}</nav><h1>{escape(title)}</h1>'
+            f'<p>{escape(heading)}</p>{body}</body></html>')
+
+
+def _events_html(events):
+    if not events:
+        return ""
+    rows = [{"Команда": goal["team"], "Событие": "Гол", "Игрок": goal.get("player") or "—",
+             "Минута": goal.get("minute"), "Ассистент": goal.get("assist")} for goal in events.get("goals", [])]
+    for kind, label in (("yellow_cards", "Жёлтая"), ("red_cards", "Красная")):
+        rows += [{"Команда": card["team"], "Событие": label, "Игрок": card["player"], "Минута": card.get("minute"),
+                  "Ассистент": None} for card in events.get(kind, [])]
+    return f"<details><summary>События матча</summary>{table_html(rows)}</details>" if rows else ""
+
+
+def standings_outputs(partition):
+    rounds = league_rounds(partition)
+    round_links = links_html([(f"standings/round-{r}.html", f"после {r} тура") for r in rounds])
+    current = standings_view(partition)
+    yield "index", current, page_html(partition, "index", "Турнирная таблица",
+                                      table_html(current["table"]) + "<h2>Таблица после тура</h2>" + round_links)
+    for round_ in rounds:
+        data = standings_view(partition, round_)
+        yield f"standings/round-{round_}", data, page_html(
+            partition, f"standings/round-{round_}", f"Таблица после {round_} тура", table_html(data["table"]))
+
+
+def round_outputs(partition):
+    rounds = league_rounds(partition)
+    yield "rounds/index", {"rounds": rounds}, page_html(
+        partition, "rounds/index", "Результаты туров", links_html([(f"round-{r}.html", f"{r} тур") for r in rounds]))
+    for round_ in rounds:
+        data = round_view(partition, round_)
+        body = "".join(f"<h3>{escape(match['home'])} — {escape(match['away'])} "
+                       f"{escape(match['score'] or 'не сыгран')}</h3><p>{escape(match['date'] or '')}</p>"
+                       f"{_events_html(match['events'])}" for match in data["matches"])
+        yield f"rounds/round-{round_}", data, page_html(partition, f"rounds/round-{round_}", f"{round_} тур", body)
+
+
+def team_outputs(partition):
+    slugs = {}
+    for team in league_teams(partition):
+        slug = slugify(team)
+        slugs[team] = slug if slug not in slugs.values() else f"{slug}-{len(slugs)}"
+    yield "teams/index", {"teams": [{"team": team, "slug": slug} for team, slug in slugs.items()]}, page_html(
+        partition, "teams/index", "Команды", links_html([(f"{slug}.html", team) for team, slug in slugs.items()]))
+    for team, slug in slugs.items():
+        data = team_view(partition, team)
+        body = ("<h2>Состав</h2>" + table_html(data["squad"], titles={
+                    "name": "Игрок", "number": "Номер", "position": "Позиция", "goals": "Голы",
+                    "assists": "Передачи", "yellow_cards": "Жёлтые", "red_cards": "Красные"}) +
+                "<h2>Матчи</h2>" + table_html(data["matches"], titles={
+                    "round": "Тур", "home": "Хозяева", "away": "Гости", "score": "Счёт"}))
+        yield f"teams/{slug}", data, page_html(partition, f"teams/{slug}", team, body)
+
+
+def cup_outputs(partition):
+    stats_path = partition.files["cup_match_stats"]
+    bracket = bracket_html(partition.files["cup_matches"], stats_path if os.path.exists(stats_path) else None)
+    yield "cup", cup_view(partition), page_html(partition, "cup", partition.cup_title, bracket)
+
+
+def stats_outputs(partition):
+    data = leaderboards_view(partition)
+    body = "".join(f"<h2>{COMPETITION_TITLES[competition]}: {KIND_TITLES[kind]}</h2>" +
+                   table_html(rows, titles={"name": "Игрок", "team": "Команда", **KIND_TITLES})
+                   for competition, kinds in data.items() for kind, rows in kinds.items())
+    yield "stats", data, page_html(partition, "stats", "Статистика игроков", body)
+
+
+def announcement_outputs(partition, today):
+    data = announcement_view(partition, today)
+    if data["round"] is None:
+        body = "<p>Все туры завершены.</p>"
+    else:
+        body = (f"<h2>Предстоящий тур: №{data['round']}</h2>" +
+                table_html(data["matches"], titles={"home": "Хозяева", "away": "Гости", "date": "Дата"}) +
+                "<h2>Лидеры таблицы</h2>" + table_html(data["leaders"]) +
+                "<h2>Лучшие бомбардиры</h2>" + table_html(data["top_scorers"], titles={
+                    "name": "Игрок", "team": "Команда", "goals": "Голы"}) +
+                "<h2>Дисквалификации</h2>" + table_html(data["suspensions"], titles={
+                    "player": "Игрок", "team": "Команда", "reason": "Причина", "remaining": "Осталось матчей"}))
+    yield "announcement", data, page_html(partition, "announcement", "Анонс тура", body)
+
+
+def output_groups(partition, today):
+    # (группа, представление для зависимостей, дополнительный ключ, генератор страниц)
+    return [
+        ("standings", "standings", None, lambda: standings_outputs(partition)),
+        ("rounds", "rounds", None, lambda: round_outputs(partition)),
+        ("teams", "teams", None, lambda: team_outputs(partition)),
+        ("cup", "cup", None, lambda: cup_outputs(partition)),
+        ("stats", "leaderboards", None, lambda: stats_outputs(partition)),
+        ("announcement", "announcement", today.isoformat(), lambda: announcement_outputs(partition, today)),
+    ]
+
+
+def _write_if_changed(path, text):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.part"
+    with open(partial, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(partial, path)
+    return True
+
+
+def build_partition(partition, target_dir, state, today, force=False):
+    # Возвращает (записанные файлы, пропущенные группы); state — ключи групп из .build.json
+    written, skipped = [], []
+    for group, view, extra, build in output_groups(partition, today):
+        key = repr((TEMPLATE_VERSION, data_version(*dependency_paths(partition, view)), extra))
+        previous = state.get(group, {})
+        if not force and previous.get("key") == key and all(
+                os.path.exists(os.path.join(target_dir, f"{name}.html")) for name in previous.get("outputs", [])):
+            skipped.append(group)
+            continue
+
+        names = []
+        for name, data, html in build():
+            names.append(name)
+            for extension, text in (("json", json.dumps(data, ensure_ascii=False, indent=1)), ("html", html)):
+                path = os.path.join(target_dir, f"{name}.{extension}")
+                if _write_if_changed(path, text):
+                    written.append(path)
+        # Страницы, которых больше нет (например, команда выбыла из состава)
+        for name in set(previous.get("outputs", [])) - set(names):
+            for extension in ("json", "html"):
+                path = os.path.join(target_dir, f"{name}.{extension}")
+                if os.path.exists(path):
+                    os.remove(path)
+                    written.append(path)
+        state[group] = {"key": key, "outputs": names}
+    return written, skipped
+
+
+def build_site(target_dir, selected=None, today=None, force=False):
+    today = today or date.today()
+    build_path = os.path.join(target_dir, BUILD_FILE)
+    try:
+        with open(build_path, encoding="utf-8") as f:
+            build_state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        build_state = {}
+
+    written, skipped = [], []
+    all_partitions = partitions()
+    for partition in selected or all_partitions:
+        partition_written, partition_skipped = build_partition(
+            partition, os.path.join(target_dir, partition.season, partition.league),
+            build_state.setdefault(partition.key, {}), today, force)
+        written += partition_written
+        skipped += [f"{partition.key}:{group}" for group in partition_skipped]
+
+    index = "".join(f'<li><a href="{escape(p.season)}/{escape(p.league)}/index.html">{escape(p.season)} — '
+                    f'{escape(p.league_title)}</a></li>' for p in all_partitions)
+    index_path = os.path.join(target_dir, "index.html")
+    if _write_if_changed(index_path, f'<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8">'
+                                    f'<title>Сезоны</title>{CSS}</head><body><h1>Сезоны</h1><ul>{index}</ul>'
+                                    f'</body></html>'):
+        written.append(index_path)
+    _write_if_changed(build_path, json.dumps(build_state, ensure_ascii=False, indent=1))
+    return written, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Статическая версия сайта (HTML и JSON)")
+    parser.add_argument("target_dir")
+    parser.add_argument("--season")
+    parser.add_argument("--league")
+    parser.add_argument("--today", type=date.fromisoformat, help="дата для анонса тура, по умолчанию сегодня")
+    parser.add_argument("--force", action="store_true", help="пересобрать всё")
+    args = parser.parse_args()
+
+    chosen = [p for p in partitions() if (args.season is None or p.season == args.season) and
+              (args.league is None or p.league == args.league)]
+    if not chosen:
+        parser.error("нет такого сезона или чемпионата")
+    changed, unchanged_groups = build_site(args.target_dir, chosen, args.today, args.force)
+    print(f"Записано файлов: {len(changed)}; без изменений групп: {len(unchanged_groups)}")
+    for path in changed:
+        print(f"  {path}")
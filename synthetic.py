@@ -0,0 +1,212 @@
+"""Синтетический сезон для замеров: все файлы данных сайта для N команд и M туров.
+
+Генерация детерминирована: одинаковые параметры и seed дают побайтно одинаковые
+файлы. Форматы совпадают с реальными (matches.csv, schedule.csv, squads.json,
+match_stats.json, cup_matches.json, cup_match_stats.json), поэтому каталог с
+результатом можно открыть сайтом как корень данных.
+
+Запуск: python synthetic.py <каталог> [--teams 20] [--rounds 38] [--density 1.0] [--seed 0]
+"""
+import argparse
+import csv
+import json
+import os
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+
+from cup_bracket import STAGES
+from data_loader import (CUP_MATCH_STATS_FILE, CUP_MATCHES_FILE, MATCH_STATS_FILE, MATCHES_FILE, SCHEDULE_FILE,
+                         SQUADS_FILE)
+from player_stats import KINDS
+
+SURNAMES = ["Иванов", "Петров", "Сидоров", "Ильин", "Романов", "Семёнов", "Шашков", "Яковлев", "Юдин", "Щукин",
+            "Царёв", "Парамонов", "Мшаров", "Хабибуллин", "Кузнецов", "Смирнов", "Попов", "Васильев", "Соколов",
+            "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Козлов", "Егоров",
+            "Павлов", "Степанов"]
+FIRST_NAMES = ["Артем", "Юрий", "Илья", "Семен", "Никита", "Роман", "Станислав", "Фёдор", "Максим", "Антон",
+               "Данил", "Павел", "Александр", "Дмитрий", "Сергей", "Андрей", "Алексей", "Иван", "Егор", "Кирилл"]
+POSITIONS = ["Врт", "ЦЗ", "ЛЗ", "ПЗ", "ЦП", "ЛП", "ПП", "Нап"]
+
+GOALS_PER_MATCH = 3.0
+CARDS_PER_MATCH = 2.0
+RED_CARD_SHARE = 0.1
+ASSIST_SHARE = 0.5
+CUP_START = date(2025, 5, 7)
+
+
+def round_robin(n_teams, n_rounds):
+    # Круговая система (метод вращения); после полного круга хозяева и гости меняются местами
+    slots = list(range(n_teams)) + ([None] if n_teams % 2 else [])
+    size = len(slots)
+    for round_ in range(n_rounds):
+        cycle, step = divmod(round_, size - 1)
+        order = [slots[0]] + slots[1:][step:] + slots[1:][:step]
+        pairs = []
+        for i in range(size // 2):
+            home, away = order[i], order[size - 1 - i]
+            if home is None or away is None:
+                continue
+            pairs.append((away, home) if (cycle + i) % 2 else (home, away))
+        yield pairs
+
+
+class SeasonGenerator:
+    """Генератор одного сезона; случайные числа берутся из одного потока по порядку."""
+
+    def __init__(self, n_teams=10, n_rounds=18, density=1.0, seed=0, played_rounds=None, squad_size=25,
+                 start=date(2025, 5, 3), interval_days=7):
+        self.rng = np.random.default_rng(seed)
+        self.n_teams = n_teams
+        self.n_rounds = n_rounds
+        self.density = density
+        self.played_rounds = n_rounds if played_rounds is None else played_rounds
+        self.start = start
+        self.interval_days = interval_days
+        self.teams = [f"ФК Команда {i + 1}" for i in range(n_teams)]
+        combos = [f"{surname} {name}" for surname in SURNAMES for name in FIRST_NAMES]
+        self.squads = {team: [{"name": combos[i], "number": int(number), "position": POSITIONS[i % len(POSITIONS)]}
+                              for i, number in zip(self.rng.choice(len(combos), squad_size, replace=False),
+                                                   self.rng.choice(np.arange(1, 100), squad_size, replace=False))]
+                       for team in self.teams}
+
+    def round_date(self, round_):
+        return self.start + timedelta(days=(round_ - 1) * self.interval_days)
+
+    def _pick(self, team):
+        players = self.squads[team]
+        return players[self.rng.integers(len(players))]["name"]
+
+    def match_events(self, home, away, home_goals, away_goals):
+        goals = []
+        for team, count in ((home, home_goals), (away, away_goals)):
+            for _ in range(count):
+                assist = self._pick(team) if self.rng.random() < ASSIST_SHARE else None
+                goals.append({"team": team, "player": self._pick(team), "minute": int(self.rng.integers(1, 91)),
+                              "assist": assist})
+        goals.sort(key=lambda goal: goal["minute"])
+        cards = {"yellow_cards": [], "red_cards": []}
+        for _ in range(self.rng.poisson(CARDS_PER_MATCH * self.density)):
+            team = home if self.rng.random() < 0.5 else away
+            kind = "red_cards" if self.rng.random() < RED_CARD_SHARE else "yellow_cards"
+            cards[kind].append({"team": team, "player": self._pick(team), "minute": int(self.rng.integers(1, 91))})
+        return goals, cards["yellow_cards"], cards["red_cards"]
+
+    def _score(self):
+        mean = GOALS_PER_MATCH * self.density / 2
+        return int(self.rng.poisson(mean * 1.15)), int(self.rng.poisson(mean * 0.85))
+
+    def league(self):
+        # Строки schedule.csv, matches.csv и записи match_stats.json
+        schedule, matches, stats = [], [], []
+        for round_, pairs in enumerate(round_robin(self.n_teams, self.n_rounds), start=1):
+            day = self.round_date(round_)
+            for home, away in pairs:
+                home, away = self.teams[home], self.teams[away]
+                schedule.append([round_, f"{day.day}.{day.month:02d}", home, away])
+                if round_ > self.played_rounds:
+                    matches.append([round_, home, away, "", ""])
+                    continue
+                hg, ag = self._score()
+                matches.append([round_, home, away, hg, ag])
+                goals, yellow, red = self.match_events(home, away, hg, ag)
+                stats.append({"home_team": home, "away_team": away, "date": day.strftime("%d.%m.%Y"),
+                              "round": round_, "score": f"{hg}:{ag}", "goals": goals, "yellow_cards": yellow,
+                              "red_cards": red})
+        return schedule, matches, stats
+
+    def cup(self):
+        # Сетка на степень двойки команд: пары в две встречи, финал в одну, ничья — пенальти
+        size = 2 ** min(len(STAGES), max(int(np.log2(max(self.n_teams, 2))), 1))
+        stages = STAGES[-int(np.log2(size)):]
+        alive = [self.teams[i] for i in self.rng.permutation(self.n_teams)[:size]]
+        fixtures, stats = [], []
+        day = CUP_START
+        for stage in stages:
+            winners = []
+            for first, second in zip(alive[::2], alive[1::2]):
+                legs = [(first, second)] if stage == STAGES[-1] else [(first, second), (second, first)]
+                total = {first: 0, second: 0}
+                for leg, (home, away) in enumerate(legs):
+                    hg, ag = self._score()
+                    total[home] += hg
+                    total[away] += ag
+                    score = f"{hg}:{ag}"
+                    if leg == len(legs) - 1 and total[first] == total[second]:
+                        ph = int(self.rng.integers(3, 6))
+                        pa = ph - 1 if self.rng.random() < 0.5 else ph + 1
+                        score += f" (пен. {ph}:{pa})"
+                        total[home if ph > pa else away] += 1
+                    leg_date = (day + timedelta(days=21 * leg)).strftime("%d.%m.%Y")
+                    fixtures.append({"stage": stage, "date": leg_date, "home": home, "away": away, "score": score})
+                    goals, yellow, red = self.match_events(home, away, hg, ag)
+                    for goal in goals:
+                        del goal["assist"]
+                    stats.append({"stage": stage, "home_team": home, "away_team": away, "date": leg_date,
+                                  "score": score, "goals": goals, "yellow_cards": yellow, "red_cards": red})
+                winners.append(first if total[first] > total[second] else second)
+            alive = winners
+            day += timedelta(days=42)
+        return fixtures, stats
+
+    def squads_with_totals(self, league_stats):
+        # Счётчики в составах совпадают с событиями чемпионата
+        counters = Counter()
+        for record in league_stats:
+            for goal in record["goals"]:
+                counters[goal["team"], goal["player"], "goals"] += 1
+                if goal["assist"]:
+                    counters[goal["team"], goal["assist"], "assists"] += 1
+            for kind in ("yellow_cards", "red_cards"):
+                for card in record[kind]:
+                    counters[card["team"], card["player"], kind] += 1
+        return {team: [{**player, **{kind: counters[team, player["name"], kind] for kind in KINDS}}
+                       for player in players]
+                for team, players in self.squads.items()}
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.writer(handle, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, ensure_ascii=False, indent=2)
+
+
+def generate_season(target_dir, n_teams=10, n_rounds=18, density=1.0, seed=0, **options):
+    # Пишет файлы сезона в target_dir и возвращает сводку: число матчей и событий
+    generator = SeasonGenerator(n_teams, n_rounds, density, seed, **options)
+    schedule, matches, league_stats = generator.league()
+    cup_matches, cup_stats = generator.cup()
+
+    os.makedirs(target_dir, exist_ok=True)
+    _write_csv(os.path.join(target_dir, SCHEDULE_FILE), ["Тур", "Дата", "Хозяева", "Гости"], schedule)
+    _write_csv(os.path.join(target_dir, MATCHES_FILE), ["Тур", "Хозяева", "Гости", "Голы хозяев", "Голы гостей"],
+               matches)
+    _write_json(os.path.join(target_dir, SQUADS_FILE), generator.squads_with_totals(league_stats))
+    _write_json(os.path.join(target_dir, MATCH_STATS_FILE), {"matches": league_stats})
+    _write_json(os.path.join(target_dir, CUP_MATCHES_FILE), cup_matches)
+    _write_json(os.path.join(target_dir, CUP_MATCH_STATS_FILE), {"matches": cup_stats})
+
+    events = sum(len(record["goals"]) + len(record["yellow_cards"]) + len(record["red_cards"])
+                 for record in league_stats + cup_stats)
+    return {"teams": n_teams, "rounds": n_rounds, "density": density, "seed": seed, "matches": len(matches),
+            "played": len(league_stats), "cup_matches": len(cup_matches), "events": events}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Синтетический сезон для замеров производительности")
+    parser.add_argument("target_dir")
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=18)
+    parser.add_argument("--density", type=float, default=1.0, help="множитель числа голов и карточек")
+    parser.add_argument("--played", type=int, default=None, help="сколько туров уже сыграно (по умолчанию все)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate_season(args.target_dir, args.teams, args.rounds, args.density, args.seed,
+                          played_rounds=args.played))
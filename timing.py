@@ -0,0 +1,187 @@
+"""Замеры времени отрисовки страниц сайта.
+
+Замеры общие для всех сессий процесса. Так как при каждом перезапуске
+выполняется только активная страница, экономия на перезапуске оценивается
+как среднее время остальных страниц, которые раньше считались бы вместе с ней.
+
+Каждый перезапуск скрипта (rerun) раскладывается по разделам (section): загрузка
+данных, таблица, статистика матча и т.д. Если задана переменная окружения
+FOOTBALL_TIMING_LOG, по каждому перезапуску в файл дописывается строка JSON:
+
+    {"ts": "...", "session": "...", "page": "Чемпионат", "total_ms": 41.2,
+     "sections": {"data_load": 3.1, "standings": 5.4, ...}, "other_ms": 12.0, "error": null}
+
+FOOTBALL_PROFILE=1 включает cProfile для всех перезапусков; администратор
+(FOOTBALL_ADMIN_TOKEN) может включить его для своей сессии из адреса страницы.
+"""
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+LOG_ENV = "FOOTBALL_TIMING_LOG"
+PROFILE_ENV = "FOOTBALL_PROFILE"
+ADMIN_TOKEN_ENV = "FOOTBALL_ADMIN_TOKEN"
+
+_lock = threading.Lock()
+_durations = defaultdict(list)
+_MAX_SAMPLES = 200
+_MAX_RERUNS = 500
+_PROFILE_LINES = 25
+
+_reruns = deque(maxlen=_MAX_RERUNS)
+_local = threading.local()
+
+
+def record(page, seconds):
+    with _lock:
+        samples = _durations[page]
+        samples.append(seconds)
+        if len(samples) > _MAX_SAMPLES:
+            del samples[0]
+
+
+def page_report():
+    with _lock:
+        snapshot = {page: list(samples) for page, samples in _durations.items()}
+    if not snapshot:
+        return pd.DataFrame(columns=["Страница", "Запусков", "Среднее, мс", "Последнее, мс", "Экономия, мс"])
+
+    means = {page: sum(samples) / len(samples) for page, samples in snapshot.items()}
+    total = sum(means.values())
+    return pd.DataFrame([{
+        "Страница": page,
+        "Запусков": len(samples),
+        "Среднее, мс": round(means[page] * 1000, 1),
+        "Последнее, мс": round(samples[-1] * 1000, 1),
+        # Время, которое заняли бы остальные страницы при отрисовке всех вкладок сразу
+        "Экономия, мс": round((total - means[page]) * 1000, 1),
+    } for page, samples in snapshot.items()])
+
+
+class Rerun:
+    """Один перезапуск скрипта: общее время и время по разделам."""
+
+    def __init__(self, page, session_id):
+        self.page = page
+        self.session_id = session_id
+        self.started = datetime.now()
+        self.sections = defaultdict(float)
+        self.total = 0.0
+        self.error = None
+        self.profile = None
+
+    def as_record(self):
+        sections = {name: round(seconds * 1000, 2) for name, seconds in self.sections.items()}
+        return {
+            "ts": self.started.isoformat(timespec="milliseconds"),
+            "session": self.session_id,
+            "page": self.page,
+            "total_ms": round(self.total * 1000, 2),
+            "sections": sections,
+            # Время вне разделов: меню, виджеты, служебная работа Streamlit внутри скрипта
+            "other_ms": round(max(self.total * 1000 - sum(sections.values()), 0), 2),
+            "error": self.error,
+        }
+
+
+def profiling_enabled():
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def is_admin(token):
+    # Панель замеров и профилирование доступны только с токеном из FOOTBALL_ADMIN_TOKEN
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    return bool(expected and token) and hmac.compare_digest(str(token), expected)
+
+
+def _profile_summary(profiler):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative").print_stats(_PROFILE_LINES)
+    return out.getvalue()
+
+
+def _write_log(record_):
+    path = os.environ.get(LOG_ENV)
+    if not path:
+        return
+    line = json.dumps(record_, ensure_ascii=False)
+    with _lock, open(path, "a", encoding="utf-8") as log:
+        log.write(line + "\n")
+
+
+@contextmanager
+def rerun(page, session_id=None, profile=False):
+    # Весь перезапуск скрипта; разделы внутри него складываются в один Rerun
+    current = Rerun(page, session_id)
+    _local.rerun = current
+    profiler = cProfile.Profile() if profile or profiling_enabled() else None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            current.profile = _profile_summary(profiler)
+        current.total = time.perf_counter() - start
+        _local.rerun = None
+        record(page, current.total)
+        with _lock:
+            _reruns.append(current)
+        _write_log(current.as_record())
+
+
+@contextmanager
+def section(name):
+    # Раздел страницы; вне rerun() замер не сохраняется
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current = getattr(_local, "rerun", None)
+        if current is not None:
+            current.sections[name] += time.perf_counter() - start
+
+
+def section_report():
+    # Среднее время разделов по страницам за последние перезапуски
+    with _lock:
+        runs = list(_reruns)
+    rows = defaultdict(list)
+    for run in runs:
+        for name, seconds in run.as_record()["sections"].items():
+            rows[run.page, name].append(seconds)
+        rows[run.page, "(вне разделов)"].append(run.as_record()["other_ms"])
+    return pd.DataFrame([{"Страница": page, "Раздел": name, "Запусков": len(values),
+                          "Среднее, мс": round(sum(values) / len(values), 1), "Максимум, мс": round(max(values), 1)}
+                         for (page, name), values in rows.items()],
+                        columns=["Страница", "Раздел", "Запусков", "Среднее, мс", "Максимум, мс"])
+
+
+def slowest_reruns(limit=10):
+    with _lock:
+        runs = sorted(_reruns, key=lambda run: run.total, reverse=True)[:limit]
+    report = []
+    for run in runs:
+        record_ = run.as_record()
+        slowest = max(record_["sections"].items(), key=lambda item: item[1], default=("—", 0))
+        report.append({"Время": run.started.strftime("%H:%M:%S"), "Сессия": (run.session_id or "—")[:8],
+                       "Страница": run.page, "Всего, мс": record_["total_ms"],
+                       "Самый долгий раздел": f"{slowest[0]} ({slowest[1]:.1f} мс)",
+                       "Ошибка": run.error or ""})
+    return pd.DataFrame(report, columns=["Время", "Сессия", "Страница", "Всего, мс", "Самый долгий раздел",
+                                         "Ошибка"])
@@ -0,0 +1,185 @@
+"""Публичные представления сайта в виде данных, готовых к JSON.
+
+Таблица, результаты тура с событиями матчей, составы, кубок, лидеры и анонс
+считаются теми же функциями, что и страницы Streamlit (хранилище снимков таблицы,
+хранилище событий, сетка кубка, таблицы лидеров). Представления используют
+статический генератор (static_site.py) и JSON API; DEPENDENCIES перечисляет файлы
+раздела, от которых зависит каждое представление.
+"""
+import json
+
+import pandas as pd
+
+from cup_bracket import STAGES, build_ties, winners_path
+from data_loader import file_exists, load_cup_matches, load_matches, load_schedule
+from discipline import discipline
+from event_store import CUP, LEAGUE, event_store
+from exports import LEADERBOARD_KINDS, leaderboard
+from match_index import cup_index, cup_key
+from player_stats import event_registry, squad_table
+from season_model import squads_model
+from standings import league_standings_store, league_table
+
+EVENT_FILES = ("matches", "match_stats", "cup_matches", "cup_match_stats")
+
+# "manifest" — манифест раздела: регламент (tiebreakers) и названия
+DEPENDENCIES = {
+    "standings": ("matches", "match_stats", "manifest"),
+    "rounds": ("matches", "schedule") + EVENT_FILES,
+    "teams": ("squads", "matches") + EVENT_FILES,
+    "cup": ("cup_matches", "cup_match_stats"),
+    "leaderboards": EVENT_FILES,
+    "announcement": ("matches", "schedule", "manifest") + EVENT_FILES,
+}
+
+
+def dependency_paths(partition, view):
+    # Отсутствующие файлы (например, статистики кубка) пропускаются: появившийся файл меняет набор путей
+    paths = {"manifest": partition.manifest, **partition.files}
+    return tuple(dict.fromkeys(paths[name] for name in DEPENDENCIES[view]
+                               if paths[name] is not None and file_exists(paths[name])))
+
+
+def records(frame):
+    # Строки DataFrame без типов numpy и NaN
+    return json.loads(frame.to_json(orient="records", force_ascii=False))
+
+
+def _score(home_goals, away_goals):
+    if pd.isna(home_goals) or pd.isna(away_goals):
+        return None
+    return f"{int(home_goals)}:{int(away_goals)}"
+
+
+def league_rounds(partition):
+    return [int(round_) for round_ in sorted(load_matches(partition.files["matches"])["Тур"].unique())]
+
+
+def league_teams(partition):
+    matches = load_matches(partition.files["matches"])
+    try:
+        squads = squads_model(partition.files["squads"]).team_names
+    except FileNotFoundError:
+        squads = ()
+    return sorted(set(squads) | set(matches["Хозяева"]) | set(matches["Гости"]))
+
+
+def standings_view(partition, round_=None):
+    store = league_standings_store(partition.files["matches"])
+    rounds = [int(r) for r in store.rounds]
+    table = league_table(partition, round_)
+    return {"round": round_ if round_ is not None else (rounds[-1] if rounds else None), "rounds": rounds,
+            "table": records(table)}
+
+
+def schedule_date(value, year):
+    # "3.05" в schedule.csv читается числом 3.05; "20.10" — числом 20.1, поэтому два знака после точки
+    text = f"{value:.2f}" if isinstance(value, float) else str(value)
+    day, month = text.split(".")[:2]
+    return f"{int(day):02d}.{int(month):02d}.{year}"
+
+
+def _schedule_dates(partition):
+    try:
+        schedule = load_schedule(partition.files["schedule"])
+    except FileNotFoundError:
+        return {}
+    return {(int(round_), home, away): schedule_date(date, partition.year)
+            for round_, date, home, away in zip(schedule["Тур"], schedule["Дата"], schedule["Хозяева"],
+                                                schedule["Гости"])}
+
+
+def round_view(partition, round_):
+    # Матчи тура со счётом и событиями сыгранных матчей
+    matches = load_matches(partition.files["matches"])
+    dates = _schedule_dates(partition)
+    events = event_store(partition.event_sources)
+    round_matches = matches[matches["Тур"] == round_]
+    result = []
+    for home, away, home_goals, away_goals in zip(round_matches["Хозяева"], round_matches["Гости"],
+                                                  round_matches["Голы хозяев"], round_matches["Голы гостей"]):
+        score = _score(home_goals, away_goals)
+        result.append({"home": home, "away": away, "date": dates.get((int(round_), home, away)), "score": score,
+                       "events": events.match_events(LEAGUE, home, away, round_=round_) if score else None})
+    return {"round": int(round_), "matches": result}
+
+
+def team_view(partition, team):
+    matches = load_matches(partition.files["matches"])
+    try:
+        players = squads_model(partition.files["squads"]).players(team)
+    except FileNotFoundError:
+        players = ()
+    squad = squad_table(players, team, event_store(partition.event_sources).player_totals(LEAGUE),
+                        event_registry(partition.files["match_stats"], partition.files["cup_match_stats"]))
+    squad["number"] = squad["number"].astype("Int64")
+    played = matches[(matches["Хозяева"] == team) | (matches["Гости"] == team)]
+    return {
+        "team": team,
+        "squad": records(squad),
+        "matches": [{"round": int(round_), "home": home, "away": away, "score": _score(home_goals, away_goals)}
+                    for round_, home, away, home_goals, away_goals in zip(
+                        played["Тур"], played["Хозяева"], played["Гости"], played["Голы хозяев"],
+                        played["Голы гостей"])],
+    }
+
+
+def cup_view(partition):
+    ties = build_ties(load_cup_matches(partition.files["cup_matches"]))
+    champion, _ = winners_path(ties)
+    # Без cup_match_stats.json — сетка и счёт без событий, как в cup_bracket.bracket_html
+    stats_path = partition.files["cup_match_stats"]
+    events = cup_index(stats_path) if file_exists(stats_path) else {}
+    stages = []
+    for stage in STAGES + [stage for stage in ties if stage not in STAGES]:
+        stage_ties = []
+        for tie in ties.get(stage, []):
+            played, goals, penalties = tie.aggregate()
+            legs = [{**leg, "events": events.get(cup_key(leg["home"], leg["away"], leg["date"]))} for leg in tie.legs]
+            stage_ties.append({"teams": list(tie.teams), "legs": legs, "goals": goals if played else None,
+                               "penalties": penalties, "winner": tie.winner()})
+        stages.append({"stage": stage, "ties": stage_ties})
+    return {"stages": stages, "champion": champion}
+
+
+def leaderboards_view(partition):
+    store = event_store(partition.event_sources)
+    return {competition: {kind: records(leaderboard(store.player_totals(competition), kind))
+                          for kind in LEADERBOARD_KINDS}
+            for competition in (LEAGUE, CUP)}
+
+
+def next_round(partition, today):
+    # Ближайший тур, у которого есть матчи не раньше today (как на странице анонса)
+    schedule = load_schedule(partition.files["schedule"]).copy()
+    schedule["Дата"] = pd.to_datetime(schedule["Дата"].map(lambda value: schedule_date(value, partition.year)),
+                                      format="%d.%m.%Y", errors="coerce")
+    future = schedule[schedule["Дата"] >= pd.Timestamp(today)].sort_values("Дата")
+    if future.empty:
+        return None, schedule.iloc[0:0]
+    round_ = future.iloc[0]["Тур"]
+    return int(round_), schedule[schedule["Тур"] == round_]
+
+
+def suspensions_view(partition, teams):
+    # Игроки, пропускающие ближайший матч чемпионата своей команды
+    return [{"player": record.player, "team": record.team, "reason": record.reason, "remaining": record.remaining}
+            for record in discipline(partition.event_sources).suspended(LEAGUE, teams)]
+
+
+def announcement_view(partition, today):
+    round_, round_matches = next_round(partition, today)
+    if round_ is None:
+        return {"round": None, "matches": [], "leaders": [], "top_scorers": [], "suspensions": []}
+    leaders = league_table(partition).head(3)
+    totals = event_store(partition.event_sources).player_totals(LEAGUE)
+    return {
+        "round": round_,
+        "matches": [{"home": home, "away": away, "date": date.strftime("%d.%m.%Y")}
+                    for home, away, date in zip(round_matches["Хозяева"], round_matches["Гости"],
+                                                round_matches["Дата"])],
+        "leaders": records(leaders[["Команда", "Очки", "Разница мячей"]]),
+        "top_scorers": records(leaderboard(totals, "goals").head(3)),
+        "suspensions": suspensions_view(partition, dict.fromkeys([*round_matches["Хозяева"],
+                                                                  *round_matches["Гости"]])),
+    }
@@ -0,0 +1,196 @@
+"""Фоновое наблюдение за файлами данных (matches.csv, JSON-файлы, манифест).
+
+Наблюдатель запоминает версию (mtime, размер) каждого файла, к которому обращался
+data_loader, и отдаёт её из памяти: перезапуск страницы без изменений данных не
+делает ни одного обращения к диску. Изменения ловит inotify через пакет watchdog,
+если он установлен, иначе поток раз в POLL_INTERVAL секунд проверяет os.stat;
+в режиме inotify файлы дополнительно сверяются раз в FULL_SCAN_INTERVAL на случай
+пропущенных событий.
+
+Для изменённого файла data_loader.refresh() заранее пересобирает только зависящие
+от него структуры, а счётчик generation сообщает открытым сессиям, что пора
+обновиться (см. data_updates в football_site.py).
+
+FOOTBALL_WATCH=0 отключает наблюдатель: версии снова проверяются os.stat при каждом обращении.
+"""
+import errno
+import logging
+import os
+import threading
+import time
+
+from data_loader import refresh, set_version_source
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+WATCH_ENV = "FOOTBALL_WATCH"
+POLL_INTERVAL = 1.0
+FULL_SCAN_INTERVAL = 30.0
+# Пауза после события, чтобы не читать файл, который ещё дописывается
+DEBOUNCE = 0.2
+
+logger = logging.getLogger(__name__)
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # Редакторы часто сохраняют через временный файл и переименование, поэтому смотрим и dest_path
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path:
+                self.watcher.touch(os.fsdecode(path))
+
+
+class DataWatcher:
+    """Версии файлов данных в памяти и поток, который следит за их изменениями."""
+
+    def __init__(self, poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.poll_interval = poll_interval
+        self.mode = "inotify" if use_inotify and Observer is not None else "polling"
+        self.generation = 0
+        self.changed = []
+        self._versions = {}
+        self._by_abspath = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._observer = None
+        self._watched_dirs = set()
+
+    def version(self, path):
+        # Источник версий для data_loader.file_version; новый путь проверяется один раз и берётся под наблюдение
+        with self._lock:
+            known = path in self._versions
+            version = self._versions.get(path)
+        if not known:
+            version = _stat(path)
+            with self._lock:
+                version = self._versions.setdefault(path, version)
+                self._by_abspath.setdefault(os.path.abspath(path), set()).add(path)
+            self._watch_dir(os.path.dirname(os.path.abspath(path)))
+        if version is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        return version
+
+    def touch(self, abspath):
+        # Событие inotify: файл проверяется после паузы DEBOUNCE
+        with self._lock:
+            for path in self._by_abspath.get(os.path.abspath(abspath), ()):
+                self._pending[path] = time.monotonic()
+
+    def check(self, paths):
+        # Сверить версии с диском; для изменённых файлов пересобрать зависимые данные
+        changed = []
+        for path in paths:
+            version = _stat(path)
+            with self._lock:
+                if self._versions.get(path) != version:
+                    self._versions[path] = version
+                    changed.append(path)
+        for path in changed:
+            logger.info("Изменился файл данных %s", path)
+            if self._versions[path] is not None:
+                refresh(path)
+        if changed:
+            with self._lock:
+                self.generation += 1
+                self.changed = changed
+        return changed
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        if self.mode == "inotify":
+            self._observer = Observer()
+            self._observer.daemon = True
+            self._observer.start()
+            with self._lock:
+                directories = {os.path.dirname(path) for path in self._by_abspath}
+            for directory in directories:
+                self._watch_dir(directory)
+        self._thread = threading.Thread(target=self._run, name="football-data-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._observer is not None:
+            self._observer.stop()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _watch_dir(self, directory):
+        if self._observer is None or not os.path.isdir(directory):
+            return
+        with self._lock:
+            if directory in self._watched_dirs:
+                return
+            self._watched_dirs.add(directory)
+        self._observer.schedule(_EventHandler(self), directory, recursive=False)
+
+    def _run(self):
+        last_scan = time.monotonic()
+        while not self._stopped.wait(self.poll_interval if self.mode == "polling" else DEBOUNCE):
+            now = time.monotonic()
+            with self._lock:
+                if self.mode == "polling" or now - last_scan >= FULL_SCAN_INTERVAL:
+                    paths = list(self._versions)
+                    self._pending.clear()
+                    last_scan = now
+                else:
+                    paths = [path for path, moment in self._pending.items() if now - moment >= DEBOUNCE]
+                    for path in paths:
+                        del self._pending[path]
+            if paths:
+                try:
+                    self.check(paths)
+                except Exception:
+                    logger.exception("Ошибка наблюдателя за файлами данных")
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_watcher(poll_interval=POLL_INTERVAL):
+    # Один наблюдатель на процесс; повторные вызовы (каждый перезапуск страницы) возвращают его же
+    global _watcher
+    if os.environ.get(WATCH_ENV, "1") == "0":
+        return None
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = DataWatcher(poll_interval).start()
+            set_version_source(_watcher.version)
+            logger.info("Наблюдение за файлами данных: %s", _watcher.mode)
+    return _watcher
+
+
+def stop_watcher():
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None:
+            set_version_source(None)
+            _watcher.stop()
+            _watcher = None
+
+
+def data_generation():
+    # Номер поколения данных: растёт при каждом замеченном изменении файлов
+    return _watcher.generation if _watcher is not None else 0